@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Typed, array-backed representation of extracted 교과학습발달상황 rows
+
+score_over_average ("82/69.2(13.6)") and 성취도/석차등급 ("A(326)", "3") are parsed
+once here into numeric columns so analytics never has to re-parse strings.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+SCORE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)\s*(?:\(\s*(\d+(?:\.\d+)?)\s*\))?')
+ACHIEVEMENT_PATTERN = re.compile(r'([A-EP])\s*(?:\(\s*(\d+)\s*\))?')
+GRADE_PATTERN = re.compile(r'^\s*(\d)')
+
+# 성취도 letters are stored as small integer codes, -1 when missing
+ACHIEVEMENT_CODES = {'A': 0, 'B': 1, 'C': 2, 'D': 3, 'E': 4, 'P': 5}
+
+SEMESTERS_PER_YEAR = 2
+
+_ARRAY_COLUMNS = (
+    "student", "subject", "semester", "credits", "raw", "mean", "std",
+    "achievement", "enrollment", "grade",
+)
+
+
+def parse_score_over_average(value: str):
+    """
+    Parse a 원점수/과목평균(표준편차) cell.
+
+    Args:
+        value (str): e.g. "82/69.2(13.6)"
+
+    Returns:
+        tuple: (raw score, subject mean, standard deviation), NaN for missing parts
+    """
+    match = SCORE_PATTERN.search(value or "")
+    if not match:
+        return np.nan, np.nan, np.nan
+    raw, mean, std = match.groups()
+    return float(raw), float(mean), float(std) if std else np.nan
+
+
+def parse_achievement(value: str):
+    """
+    Parse a 성취도(수강자수) cell.
+
+    Args:
+        value (str): e.g. "A(326)" or "A"
+
+    Returns:
+        tuple: (achievement code, enrollment), -1 / NaN for missing parts
+    """
+    match = ACHIEVEMENT_PATTERN.search(value or "")
+    if not match:
+        return -1, np.nan
+    letter, enrollment = match.groups()
+    return ACHIEVEMENT_CODES[letter], float(enrollment) if enrollment else np.nan
+
+
+def parse_grade(value: str) -> float:
+    """Parse a 석차등급 cell, NaN for courses without a rank grade (e.g. 과학탐구실험)."""
+    match = GRADE_PATTERN.match(value or "")
+    return float(match.group(1)) if match else np.nan
+
+
+def _field(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def semester_index(year: int, term: int) -> int:
+    """0-based semester across the whole record: 1학년 1학기 -> 0, 1학년 2학기 -> 1, 2학년 1학기 -> 2, ..."""
+    return (year - 1) * SEMESTERS_PER_YEAR + (term - 1)
+
+
+@dataclass
+class AcademicTable:
+    """
+    Column store of academic rows for a whole cohort.
+
+    Every column is a numpy array of the same length, one entry per row.
+    student and subject are integer codes into student_ids and subjects.
+    """
+    student_ids: List[str]
+    subjects: List[str]
+    student: np.ndarray
+    subject: np.ndarray
+    semester: np.ndarray
+    credits: np.ndarray
+    raw: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    achievement: np.ndarray
+    enrollment: np.ndarray
+    grade: np.ndarray
+
+    def __len__(self):
+        return len(self.student)
+
+    @property
+    def n_students(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def n_subjects(self) -> int:
+        return len(self.subjects)
+
+    @classmethod
+    def from_records(cls, records_by_student: Dict[str, Iterable]):
+        """
+        Build the table from extracted AcademicDevelopment rows.
+
+        The semester comes from the extracted 학년/학기 of every row. A row the
+        extraction left at 0 (the 학기 number is printed once per block) takes the
+        학년/학기 of the row before it, or 1학년 1학기 for the first row.
+
+        Args:
+            records_by_student (Dict[str, Iterable]): student id -> AcademicDevelopment
+                models or their model_dump() dicts
+
+        Returns:
+            AcademicTable: The parsed cohort table
+
+        Raises:
+            ValueError: If rows were extracted without 학년/학기 (before the fields
+            existed) and have to be extracted again
+        """
+        student_ids = list(records_by_student)
+        subject_index: Dict[str, int] = {}
+        columns = {name: [] for name in _ARRAY_COLUMNS}
+
+        for student_code, student_id in enumerate(student_ids):
+            year, term = 1, 1
+            for row in records_by_student[student_id]:
+                subject_name = _field(row, "과목").strip()
+                subject_code = subject_index.setdefault(subject_name, len(subject_index))
+                try:
+                    year, term = _field(row, "학년") or year, _field(row, "학기") or term
+                except (KeyError, AttributeError):
+                    raise ValueError(f"{student_id}: academic rows have no 학년/학기, extract them again") from None
+                semester = semester_index(year, term)
+
+                raw, mean, std = parse_score_over_average(_field(row, "score_over_average"))
+                achievement, enrollment = parse_achievement(_field(row, "성취도"))
+
+                columns["student"].append(student_code)
+                columns["subject"].append(subject_code)
+                columns["semester"].append(semester)
+                columns["credits"].append(_field(row, "학점수"))
+                columns["raw"].append(raw)
+                columns["mean"].append(mean)
+                columns["std"].append(std)
+                columns["achievement"].append(achievement)
+                columns["enrollment"].append(enrollment)
+                columns["grade"].append(parse_grade(_field(row, "석차등급")))
+
+        return cls(
+            student_ids=student_ids,
+            subjects=list(subject_index),
+            student=np.asarray(columns["student"], dtype=np.int32),
+            subject=np.asarray(columns["subject"], dtype=np.int32),
+            semester=np.asarray(columns["semester"], dtype=np.int8),
+            credits=np.asarray(columns["credits"], dtype=np.float32),
+            raw=np.asarray(columns["raw"], dtype=np.float32),
+            mean=np.asarray(columns["mean"], dtype=np.float32),
+            std=np.asarray(columns["std"], dtype=np.float32),
+            achievement=np.asarray(columns["achievement"], dtype=np.int8),
+            enrollment=np.asarray(columns["enrollment"], dtype=np.float32),
+            grade=np.asarray(columns["grade"], dtype=np.float32),
+        )
+
+    def save(self, path: str):
+        """Save the table as a .npz file so consumers can load it without re-parsing."""
+        np.savez_compressed(
+            path,
+            student_ids=np.asarray(self.student_ids),
+            subjects=np.asarray(self.subjects),
+            **{name: getattr(self, name) for name in _ARRAY_COLUMNS},
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a table written by save()."""
+        with np.load(path) as data:
+            return cls(
+                student_ids=data["student_ids"].tolist(),
+                subjects=data["subjects"].tolist(),
+                **{name: data[name] for name in _ARRAY_COLUMNS},
+            )
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+Offline batch-submission mode for nightly bulk extraction and validation
+
+Every pending extraction and validation request (the same bodies exp4 and
+validate_text send live) is written to one JSONL batch file, submitted to a
+batch-capable endpoint (or a local stand-in), polled, and the results are
+scattered back into each student's output directory.
+
+A run lives in its own directory with a checkpointed state.json:
+    prepared -> submitting -> submitted -> completed -> scattered
+                                        -> failed
+The state is written before every external side effect, and the submission is
+tagged with the run id, so a run resumed after a crash finds its existing batch
+instead of submitting the same requests twice. A batch that expires or is
+cancelled still has its partial output and error file downloaded and scattered;
+it only ends as "failed" when the endpoint returned no results at all.
+
+Keep all runs under one parent directory: a new run skips every request that an
+unfinished sibling run (not yet scattered or failed) already has in flight.
+
+Usage:
+    python batch_mode.py --students students.jsonl --run-dir dev/medsky/batch_runs/2025-09-01
+    python batch_mode.py --run-dir dev/medsky/batch_runs/2025-09-01            # resume
+    python batch_mode.py --run-dir ... --backend local                          # no batch endpoint
+
+The openai backend needs MEDSKY_BATCH_BASE_URL (and MEDSKY_BATCH_API_KEY) of an
+endpoint that serves the request model; --model / MEDSKY_BATCH_MODEL replaces
+the model in every request body when the batch endpoint names it differently.
+
+students.jsonl lines: {"student_id": "park", "parsed_text_path": "...", "output_dir": "..."}
+
+With --profile-dir the prepare and scatter stages are profiled under
+PROFILE_DIR/batch_<run dir name>/ (see profiling.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from exp2_parsing_via_regex import split_sections
+from exp4_extraction import build_extraction_request
+from exp5_validation import build_validation_request, salvage_validation_output
+from profiling import PROFILE_DIR, configure_profiling, profile_stage, profile_student
+from request_templates import DEFAULT_LAYOUT
+from scheduler import (
+    add_scheduler_arguments,
+    configure_scheduler,
+    job_context,
+    schedule,
+    scheduler_from_args,
+    scheduler_stats,
+)
+from schemas import EXTRACTION_MODELS, EXTRACTION_SECTIONS, VALIDATION_TYPES, ValidationOutput, dump_json
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+UNFINISHED_STATUSES = ("prepared", "submitting", "submitted", "completed")
+
+
+def _write_bytes_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_json_atomic(path: str, data):
+    _write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+def _read_jsonl(path: str):
+    """Yield parsed lines, skipping a torn last line left by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def load_state(run_dir: str) -> dict:
+    with open(os.path.join(run_dir, "state.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(run_dir: str, state: dict):
+    state["updated_at"] = time.time()
+    _write_json_atomic(os.path.join(run_dir, "state.json"), state)
+
+
+def _result_path(output_dir: str, section: str, validation_type: str = None) -> str:
+    # Same file names as whole_flow.save_analysis
+    if validation_type is None:
+        return os.path.join(output_dir, f"{section}_parsed.json")
+    return os.path.join(output_dir, f"{section}_{validation_type}.json")
+
+
+def _in_flight_results(run_dir: str) -> set:
+    """Result paths requested by unfinished sibling runs of run_dir (the in-flight ledger)."""
+    run_dir = os.path.abspath(run_dir)
+    runs_root = os.path.dirname(run_dir)
+    in_flight = set()
+    for name in os.listdir(runs_root):
+        other = os.path.join(runs_root, name)
+        if other == run_dir:
+            continue
+        try:
+            status = load_state(other)["status"]
+            with open(os.path.join(other, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError, KeyError):
+            continue  # Not a run directory, or not prepared yet
+        if status in UNFINISHED_STATUSES:
+            in_flight.update(_result_path(entry["output_dir"], entry["section"], entry["validation_type"])
+                             for entry in manifest.values())
+    return in_flight
+
+
+def prepare_run(students_path: str, run_dir: str, layout: str = DEFAULT_LAYOUT, model: str = None) -> dict:
+    """
+    Serialize every pending request of the listed students into run_dir/requests.jsonl.
+
+    A request is pending when its result file does not exist in the student's
+    output_dir yet and no unfinished sibling run has it in flight.
+
+    Args:
+        students_path (str): students.jsonl as described in the module docstring
+        run_dir (str): Directory of the new run
+        layout (str): Validation prompt layout, one of PROMPT_LAYOUTS
+        model (str, optional): Model name to put in every request body instead of the live one
+
+    Returns:
+        dict: The initial run state
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    in_flight = _in_flight_results(run_dir)
+    manifest = {}
+    skipped = 0
+    requests_path = os.path.join(run_dir, "requests.jsonl")
+    tmp_path = f"{requests_path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for student in _read_jsonl(students_path):
+            with open(student["parsed_text_path"], "r", encoding="utf-8") as f:
+                sections = split_sections(f.read())
+            output_dir = student["output_dir"]
+
+            entries = []
+            for section, section_type in EXTRACTION_SECTIONS.items():
+                entries.append((section, None, build_extraction_request(section_type, sections[section])))
+                for validation_type in VALIDATION_TYPES:
+                    entries.append((section, validation_type,
+                                    build_validation_request(sections[section], validation_type, layout)))
+
+            for section, validation_type, body in entries:
+                result_path = _result_path(output_dir, section, validation_type)
+                if os.path.exists(result_path):
+                    continue
+                if result_path in in_flight:
+                    skipped += 1
+                    continue
+                if model:
+                    body = {**body, "model": model}
+                custom_id = f"{student['student_id']}|{section}|{validation_type or 'extraction'}"
+                manifest[custom_id] = {
+                    "student_id": student["student_id"],
+                    "output_dir": output_dir,
+                    "section": section,
+                    "validation_type": validation_type,
+                }
+                out.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": body,
+                }, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, requests_path)
+    _write_json_atomic(os.path.join(run_dir, "manifest.json"), manifest)
+
+    state = {"run_id": uuid.uuid4().hex, "status": "prepared", "n_requests": len(manifest), "created_at": time.time()}
+    save_state(run_dir, state)
+    print(f"📦 Prepared {len(manifest)} requests in {requests_path}")
+    if skipped:
+        print(f"⏭️  Skipped {skipped} requests still in flight in unfinished runs")
+    return state
+
+
+class OpenAIBatchBackend:
+    """Submit to an OpenAI-compatible Batch API (MEDSKY_BATCH_BASE_URL / MEDSKY_BATCH_API_KEY)."""
+
+    def __init__(self, run_dir: str):
+        from openai import OpenAI
+
+        base_url = os.getenv("MEDSKY_BATCH_BASE_URL")
+        if not base_url:
+            # The SDK default (api.openai.com) does not serve the pipeline's model
+            raise ValueError("MEDSKY_BATCH_BASE_URL must point at a Batch API that serves the request model")
+        self.run_dir = run_dir
+        self.client = OpenAI(
+            api_key=os.getenv("MEDSKY_BATCH_API_KEY") or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url,
+        )
+
+    def find_existing(self, run_id: str):
+        for batch in self.client.batches.list(limit=100):
+            if (batch.metadata or {}).get("medsky_run") == run_id:
+                return batch.id
+        return None
+
+    def submit(self, requests_path: str, run_id: str) -> str:
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"medsky_run": run_id},
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> str:
+        """
+        Return 'pending' while the batch runs, otherwise its final status ('completed',
+        'expired', 'cancelled' or 'failed'). Once it has ended, whatever output and
+        error files it has are downloaded to output.jsonl and errors.jsonl, so the
+        results of an expired or cancelled batch are not lost.
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return "pending"
+        for file_id, name in ((batch.output_file_id, "output.jsonl"), (batch.error_file_id, "errors.jsonl")):
+            if file_id:
+                _write_bytes_atomic(os.path.join(self.run_dir, name), self.client.files.content(file_id).read())
+        return batch.status
+
+
+class LocalBatchBackend:
+    """
+    Local stand-in for a batch endpoint: runs the batch file through the live
+    client in the 'batch' scheduler class, appending each result to output.jsonl
+    as it arrives. Requests already in output.jsonl are never sent again.
+    """
+
+    def __init__(self, run_dir: str, concurrency: int = 8):
+        self.run_dir = run_dir
+        self.concurrency = concurrency
+        self.marker_path = os.path.join(run_dir, "local_batch.json")
+        self.output_path = os.path.join(run_dir, "output.jsonl")
+
+    def find_existing(self, run_id: str):
+        return run_id if os.path.exists(self.marker_path) else None
+
+    def submit(self, requests_path: str, run_id: str) -> str:
+        _write_json_atomic(self.marker_path, {"batch_id": run_id, "requests_path": requests_path})
+        return run_id
+
+    def poll(self, batch_id: str) -> str:
+        done = {line["custom_id"] for line in _read_jsonl(self.output_path)}
+        pending = [line for line in _read_jsonl(os.path.join(self.run_dir, "requests.jsonl"))
+                   if line["custom_id"] not in done]
+        if pending:
+            asyncio.run(self._run(pending))
+        return "completed"
+
+    async def _run(self, pending):
+        from clients import get_openai_client
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with open(self.output_path, "a", encoding="utf-8") as out:
+            async def one(line):
+                async with semaphore:
+                    try:
+                        response = await schedule(lambda: get_openai_client().chat.completions.create(**line["body"]))
+                        record = {"custom_id": line["custom_id"],
+                                  "response": {"status_code": 200, "body": response.model_dump()}, "error": None}
+                    except Exception as e:
+                        record = {"custom_id": line["custom_id"], "response": None, "error": {"message": str(e)[:500]}}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+            with job_context("batch"):
+                await asyncio.gather(*[one(line) for line in pending])
+
+
+def scatter_results(run_dir: str) -> dict:
+    """
+    Write every batch result to its student's output directory.
+
+    Reads output.jsonl and the endpoint's errors.jsonl. Failed requests, results
+    that cannot be parsed or were cut off mid-answer, and requests the batch
+    never answered (expired or cancelled) are listed in run_dir/failed.jsonl;
+    their result files stay missing, so the next run prepares them again.
+
+    Returns:
+        dict: Counts of written, failed and missing results
+    """
+    with open(os.path.join(run_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    written, failed, seen = 0, [], set()
+    lines = [*_read_jsonl(os.path.join(run_dir, "output.jsonl")), *_read_jsonl(os.path.join(run_dir, "errors.jsonl"))]
+    for line in lines:
+        entry = manifest.get(line["custom_id"])
+        if entry is None or line["custom_id"] in seen:
+            continue
+        seen.add(line["custom_id"])
+        try:
+            if line.get("error") or not line.get("response") or line["response"]["status_code"] != 200:
+                raise ValueError(json.dumps(line.get("error"), ensure_ascii=False))
+            content = line["response"]["body"]["choices"][0]["message"]["content"] or ""
+            validation_type = entry["validation_type"]
+            if validation_type is None:
+                result = EXTRACTION_MODELS[EXTRACTION_SECTIONS[entry["section"]]].model_validate_json(content)
+            else:
+                try:
+                    result = ValidationOutput.model_validate_json(content)
+                except ValueError:
+                    salvaged = salvage_validation_output(content, validation_type)
+                    if salvaged is None:
+                        raise
+                    result, truncated = salvaged
+                    if truncated:
+                        # A cut-off answer saved as complete would never be prepared again
+                        raise ValueError(f"truncated response ({len(result.Feedbacks)} items salvaged)")
+        except Exception as e:
+            failed.append({"custom_id": line["custom_id"], "error": str(e)[:300]})
+            continue
+
+        os.makedirs(entry["output_dir"], exist_ok=True)
+        # Compact bytes straight from pydantic-core; thousands of results per nightly run
+        _write_bytes_atomic(_result_path(entry["output_dir"], entry["section"], entry["validation_type"]),
+                            dump_json(result))
+        written += 1
+
+    missing = [custom_id for custom_id in manifest if custom_id not in seen]
+    with open(os.path.join(run_dir, "failed.jsonl"), "w", encoding="utf-8") as f:
+        for item in failed + [{"custom_id": custom_id, "error": "no result in batch output"} for custom_id in missing]:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    return {"written": written, "failed": len(failed), "missing": len(missing)}
+
+
+def run_batch(run_dir: str, backend, poll_interval: float = 60.0) -> dict:
+    """
+    Drive a prepared run to completion, resuming from whatever state.json says.
+
+    Returns:
+        dict: The final run state
+    """
+    state = load_state(run_dir)
+
+    if state["status"] in ("prepared", "submitting"):
+        if state["n_requests"] == 0:
+            state["status"] = "scattered"
+            save_state(run_dir, state)
+            return state
+        # Record the intent first: a crash after this point is resolved by find_existing
+        state["status"] = "submitting"
+        save_state(run_dir, state)
+        batch_id = backend.find_existing(state["run_id"])
+        if batch_id is None:
+            batch_id = backend.submit(os.path.join(run_dir, "requests.jsonl"), state["run_id"])
+            print(f"🚀 Submitted batch {batch_id} ({state['n_requests']} requests)")
+        else:
+            print(f"♻️  Found already submitted batch {batch_id}")
+        state["batch_id"] = batch_id
+        state["status"] = "submitted"
+        save_state(run_dir, state)
+
+    while state["status"] == "submitted":
+        outcome = backend.poll(state["batch_id"])
+        if outcome == "pending":
+            time.sleep(poll_interval)
+            continue
+        state["batch_status"] = outcome
+        has_results = any(os.path.exists(os.path.join(run_dir, name)) for name in ("output.jsonl", "errors.jsonl"))
+        # An expired or cancelled batch still scatters the results it returned
+        state["status"] = "completed" if outcome == "completed" or has_results else "failed"
+        if outcome != "completed":
+            print(f"⚠️  Batch {state['batch_id']} ended as {outcome}"
+                  f"{'; scattering its partial results' if has_results else ' without results'}")
+        if scheduler_stats():
+            # Queue waits of requests the local backend sent through the scheduler
+            state["scheduler"] = scheduler_stats()
+        save_state(run_dir, state)
+
+    if state["status"] == "completed":
+        with profile_stage("scatter"):
+            state["scatter"] = scatter_results(run_dir)
+        state["status"] = "scattered"
+        save_state(run_dir, state)
+        print(f"✅ Scattered results: {state['scatter']}")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nightly batch extraction and validation")
+    parser.add_argument("--run-dir", required=True)
+    parser.add_argument("--students", help="students.jsonl; required when the run does not exist yet")
+    parser.add_argument("--backend", choices=["openai", "local"], default=os.getenv("MEDSKY_BATCH_BACKEND", "openai"))
+    parser.add_argument("--layout", default=DEFAULT_LAYOUT)
+    parser.add_argument("--model", default=os.getenv("MEDSKY_BATCH_MODEL"),
+                        help="Model name for the batch request bodies (default: the live model)")
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Profile the local stages into this directory")
+    add_scheduler_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling(args.profile_dir)
+    configure_scheduler(scheduler_from_args(args))
+
+    if not os.path.exists(os.path.join(args.run_dir, "state.json")) and not args.students:
+        parser.error("--students is required to start a new run")
+    if args.backend == "openai" and not os.getenv("MEDSKY_BATCH_BASE_URL"):
+        parser.error("the openai backend needs MEDSKY_BATCH_BASE_URL (or use --backend local)")
+
+    with profile_student(f"batch_{os.path.basename(os.path.normpath(args.run_dir))}"):
+        if not os.path.exists(os.path.join(args.run_dir, "state.json")):
+            with profile_stage("prepare"):
+                prepare_run(args.students, args.run_dir, args.layout, args.model)
+
+        backend = OpenAIBatchBackend(args.run_dir) if args.backend == "openai" else LocalBatchBackend(args.run_dir)
+        run_batch(args.run_dir, backend, args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark vectorized cohort analytics against row-by-row string parsing at 100k rows.
+
+The synthetic records span up to three 학년 with a different subject list per
+학년 (as on real records), and both paths must agree on GPA, semester GPAs and
+percentiles.
+"""
+import bisect
+import random
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from academic_table import AcademicTable, parse_grade, parse_score_over_average, semester_index
+from cohort_analytics import analyze_cohort
+
+SUBJECTS_BY_YEAR = {
+    1: [("국어", 4), ("수학", 4), ("영어", 3), ("한국사", 3), ("통합사회", 4), ("통합과학", 4), ("과학탐구실험", 1)],
+    2: [("문학", 4), ("수학Ⅰ", 4), ("영어Ⅰ", 4), ("물리학Ⅰ", 3), ("화학Ⅰ", 3), ("생명과학Ⅰ", 3)],
+    3: [("언어와 매체", 4), ("미적분", 4), ("영어Ⅱ", 4), ("화학Ⅱ", 3), ("생명과학Ⅱ", 3)],
+}
+
+
+def synthetic_cohort(n_rows: int = 100_000, seed: int = 0):
+    """Generate extracted-style academic rows (string cells) for a cohort of students."""
+    rng = random.Random(seed)
+    cohort = {}
+    rows = 0
+    student = 0
+    while rows < n_rows:
+        records = []
+        for semester in range(rng.randint(2, 6)):
+            year, term = divmod(semester, 2)
+            for subject, credits in SUBJECTS_BY_YEAR[year + 1]:
+                mean = rng.uniform(55, 80)
+                std = rng.uniform(10, 20)
+                raw = max(0, min(100, round(rng.gauss(mean, std))))
+                records.append({
+                    "학년": year + 1,
+                    "학기": term + 1,
+                    "과목": subject,
+                    "학점수": credits,
+                    "score_over_average": f"{raw}/{mean:.1f}({std:.1f})",
+                    "성취도": f"{'ABCDE'[min(4, max(0, (100 - raw) // 10 - 1))]}({rng.randint(200, 400)})",
+                    "석차등급": "" if subject == "과학탐구실험" else str(rng.randint(1, 9)),
+                })
+        cohort[f"student_{student:05d}"] = records
+        rows += len(records)
+        student += 1
+    return cohort
+
+
+def row_by_row(cohort):
+    """Today's approach: every consumer re-parses the string cells row by row."""
+    gpa = {}
+    z = []
+    by_group = defaultdict(list)
+    parsed_rows = []
+    trends = {}
+    for student_id, records in cohort.items():
+        weighted = credits_total = 0.0
+        per_semester = defaultdict(lambda: [0.0, 0.0])
+        for row in records:
+            semester = semester_index(row["학년"], row["학기"])
+            raw, mean, std = parse_score_over_average(row["score_over_average"])
+            grade = parse_grade(row["석차등급"])
+            z.append((raw - mean) / std if std else float("nan"))
+            by_group[(row["과목"], semester)].append(raw)
+            parsed_rows.append((row["과목"], semester, raw))
+            if grade == grade:
+                weighted += grade * row["학점수"]
+                credits_total += row["학점수"]
+                per_semester[semester][0] += grade * row["학점수"]
+                per_semester[semester][1] += row["학점수"]
+        gpa[student_id] = weighted / credits_total if credits_total else float("nan")
+        trends[student_id] = {s: t / c for s, (t, c) in per_semester.items() if c}
+
+    for scores in by_group.values():
+        scores.sort()
+    percentile = []
+    for subject, semester, raw in parsed_rows:
+        scores = by_group[(subject, semester)]
+        below = bisect.bisect_left(scores, raw)
+        upto = bisect.bisect_right(scores, raw)
+        percentile.append((below + 0.5 * (upto - below)) / len(scores) * 100)
+    return gpa, z, percentile, trends
+
+
+def check_multi_year():
+    """Semesters come from 학년/학기, not from repeated subjects, when the subject list changes."""
+    rows = [
+        {"학년": year, "학기": term, "과목": subject, "학점수": 4,
+         "score_over_average": "80/70.0(10.0)", "성취도": "A(300)", "석차등급": str(grade)}
+        for year, term, subject, grade in [
+            (1, 1, "국어", 2), (1, 1, "수학", 2), (1, 2, "국어", 3), (1, 2, "수학", 3),
+            (2, 1, "문학", 4), (2, 1, "수학Ⅰ", 4), (2, 2, "문학", 5), (2, 2, "수학Ⅰ", 5),
+        ]
+    ]
+    table = AcademicTable.from_records({"multi_year": rows})
+    assert table.semester.tolist() == [0, 0, 1, 1, 2, 2, 3, 3], table.semester
+    trends = analyze_cohort(table)
+    assert np.allclose(trends["gpa_by_semester"][0], [2, 3, 4, 5])
+    assert np.isclose(trends["gpa_slope"][0], 1.0)
+
+
+def main(n_rows: int = 100_000):
+    check_multi_year()
+
+    cohort = synthetic_cohort(n_rows)
+    total_rows = sum(len(r) for r in cohort.values())
+    print(f"Cohort: {len(cohort)} students, {total_rows} rows\n")
+
+    start = time.perf_counter()
+    gpa, _, percentile, trends = row_by_row(cohort)
+    baseline = time.perf_counter() - start
+    print(f"Row-by-row parse + analytics : {baseline * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    table = AcademicTable.from_records(cohort)
+    build = time.perf_counter() - start
+    print(f"Build AcademicTable (once)   : {build * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    results = analyze_cohort(table)
+    vectorized = time.perf_counter() - start
+    print(f"Vectorized analytics         : {vectorized * 1000:8.1f} ms")
+    print(f"\nSpeedup per analytics pass: {baseline / vectorized:.1f}x "
+          f"({baseline / (build + vectorized):.1f}x including the one-time build)")
+
+    expected = np.array([gpa[s] for s in table.student_ids])
+    assert np.allclose(results["gpa"], expected, equal_nan=True, atol=1e-4)
+    assert np.allclose(results["percentile"], percentile, equal_nan=True, atol=1e-3)
+    for student_code, student_id in enumerate(table.student_ids):
+        for semester, value in trends[student_id].items():
+            assert np.isclose(results["gpa_by_semester"][student_code, semester], value, atol=1e-4)
+
+
+if __name__ == "__main__":
+    main()
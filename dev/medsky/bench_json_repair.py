@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Measure how often local JSON repair recovers bad validation responses and how many
+re-requests it saves.
+
+The corpus is every response recorded under MEDSKY_BAD_RESPONSE_DIR plus synthetic
+faults (truncation, trailing commas, unescaped quotes, raw newlines, markdown fences)
+applied to the golden files in validation_results/.
+"""
+import glob
+import json
+import os
+
+from exp5_validation import salvage_validation_output
+from schemas import ValidationOutput
+from structured_repair import remaining_text
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, "validation_results")
+SECTION_FILES = {
+    'creative_activities': os.path.join(BASE_DIR, "file/park/1_creative_activities.txt"),
+    'academic_development': os.path.join(BASE_DIR, "file/park/2_academic_development.txt"),
+    'detailed_abilities': os.path.join(BASE_DIR, "file/park/3_detailed_abilities.txt"),
+}
+
+
+def _fault_variants(golden: dict):
+    """Yield (fault name, bad content) pairs derived from one golden result."""
+    compact = json.dumps(golden, ensure_ascii=False)
+    pretty = json.dumps(golden, ensure_ascii=False, indent=2)
+
+    for fraction in (0.3, 0.6, 0.9):
+        yield f"truncated_{int(fraction * 100)}", pretty[:int(len(pretty) * fraction)]
+
+    yield "trailing_comma", pretty.replace("\n  ]", ",\n  ]").replace("\n    }", ",\n    }")
+    yield "markdown_fence", f"다음은 결과입니다.\n```json\n{pretty}\n```"
+    wrapped = json.loads(compact)
+    for fb in wrapped["Feedbacks"]:
+        fb["feedback"] = fb["feedback"].replace(". ", ".\n")
+    yield "raw_newline", json.dumps(wrapped, ensure_ascii=False).replace("\\n", "\n")
+
+    quoted = json.loads(compact)
+    for fb in quoted["Feedbacks"]:
+        fb["feedback"] = fb["feedback"].replace("'", '"')
+    yield "unescaped_quote", json.dumps(quoted, ensure_ascii=False).replace('\\"', '"')
+
+
+def build_corpus():
+    """Collect recorded bad responses and synthetic faults into one list of cases."""
+    cases = []
+    recorded_dir = os.getenv("MEDSKY_BAD_RESPONSE_DIR")
+    if recorded_dir:
+        for path in sorted(glob.glob(os.path.join(recorded_dir, "*.json"))):
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            cases.append({
+                "fault": "recorded",
+                "validation_type": record["validation_type"],
+                "content": record["content"],
+                "expected": None,
+                "source": None,
+            })
+
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+        section = next(key for key in SECTION_FILES if os.path.basename(path).startswith(key))
+        with open(SECTION_FILES[section], 'r', encoding='utf-8') as f:
+            source = f.read()
+        for fault, content in _fault_variants(golden):
+            cases.append({
+                "fault": fault,
+                "validation_type": golden["type"],
+                "content": content,
+                "expected": ValidationOutput.model_validate(golden),
+                "source": source,
+            })
+    return cases
+
+
+def run_benchmark():
+    cases = build_corpus()
+    stats = {}
+    for case in cases:
+        row = stats.setdefault(case["fault"], {
+            "cases": 0, "repaired": 0, "partial": 0, "failed": 0,
+            "items_expected": 0, "items_kept": 0,
+            "calls_saved": 0, "input_chars_full": 0, "input_chars_sent": 0,
+        })
+        row["cases"] += 1
+        source_len = len(case["source"]) if case["source"] else 0
+        row["input_chars_full"] += source_len
+
+        salvaged = salvage_validation_output(case["content"], case["validation_type"])
+        if salvaged is None:
+            # Same as before: a full re-request is needed
+            row["failed"] += 1
+            row["input_chars_sent"] += source_len
+            continue
+
+        output, truncated = salvaged
+        if case["expected"] is not None:
+            expected = [fb.sentence for fb in case["expected"].Feedbacks]
+            kept = [fb.sentence for fb in output.Feedbacks]
+            row["items_expected"] += len(expected)
+            row["items_kept"] += sum(1 for s in kept if s in expected)
+
+        if not truncated:
+            row["repaired"] += 1
+            row["calls_saved"] += 1
+            continue
+
+        row["partial"] += 1
+        remainder = remaining_text(case["source"], [fb.sentence for fb in output.Feedbacks]) if case["source"] else None
+        row["input_chars_sent"] += len(remainder) if remainder is not None else source_len
+        if remainder is not None and not remainder.strip():
+            row["calls_saved"] += 1
+
+    header = f"{'fault':<18}{'cases':>7}{'repaired':>10}{'partial':>9}{'failed':>8}{'items kept':>13}{'calls saved':>13}{'input sent':>12}"
+    print(header)
+    print("-" * len(header))
+    totals = {}
+    for fault, row in stats.items():
+        for key, value in row.items():
+            totals[key] = totals.get(key, 0) + value
+        _print_row(fault, row)
+    print("-" * len(header))
+    _print_row("total", totals)
+
+    success = (totals["repaired"] + totals["partial"]) / max(totals["cases"], 1)
+    print(f"\nLocal recovery rate: {success:.1%} of {totals['cases']} bad responses")
+    print(f"Full re-requests avoided: {totals['calls_saved']} / {totals['cases']}")
+    return stats
+
+
+def _print_row(name, row):
+    items = f"{row['items_kept']}/{row['items_expected']}" if row["items_expected"] else "-"
+    sent = f"{row['input_chars_sent'] / row['input_chars_full']:.0%}" if row["input_chars_full"] else "-"
+    print(f"{name:<18}{row['cases']:>7}{row['repaired']:>10}{row['partial']:>9}{row['failed']:>8}{items:>13}{row['calls_saved']:>13}{sent:>12}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Compare billed input, prompt-cache hits and latency of the two validation layouts.
+
+Runs the 15 park validations once per layout against the live API (needs
+OPENROUTER_API_KEY). Within a section the first validation is awaited before
+the other four start, so the shared prefix is in the provider cache when they run.
+"""
+import asyncio
+import os
+
+from exp5_validation import validate_text
+from request_templates import PROMPT_LAYOUTS
+from schemas import VALIDATION_TYPES
+from usage_stats import print_usage_summary
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SECTION_FILES = {
+    'creative_activities': os.path.join(BASE_DIR, "file/park/1_creative_activities.txt"),
+    'academic_development': os.path.join(BASE_DIR, "file/park/2_academic_development.txt"),
+    'detailed_abilities': os.path.join(BASE_DIR, "file/park/3_detailed_abilities.txt"),
+}
+
+
+async def run_layout(layout: str):
+    for path in SECTION_FILES.values():
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        first, *rest = VALIDATION_TYPES
+        await validate_text(text, first, layout=layout)
+        await asyncio.gather(*[validate_text(text, validation_type, layout=layout) for validation_type in rest])
+
+
+async def main():
+    for layout in PROMPT_LAYOUTS:
+        print(f"🚀 Running 15 validations with layout={layout}")
+        await run_layout(layout)
+    print()
+    print_usage_summary()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Simulate a batch backfill and interactive uploads sharing one provider quota.
+
+Compares interactive queue-wait p95 with a single FIFO queue against the
+weighted-fair and strict-priority schedulers. Provider latency is simulated
+with asyncio.sleep, so no API calls are made.
+"""
+import asyncio
+import random
+import time
+
+from scheduler import LLMScheduler
+
+CONCURRENCY = 8
+CALL_LATENCY = 0.02
+BATCH_REQUESTS = 1500
+INTERACTIVE_STUDENTS = 20
+CALLS_PER_STUDENT = 15
+
+
+async def fake_llm_call():
+    await asyncio.sleep(CALL_LATENCY * random.uniform(0.5, 1.5))
+
+
+async def run_scenario(scheduler: LLMScheduler, interactive_class: str):
+    random.seed(0)
+    batch = [
+        asyncio.create_task(scheduler.submit(fake_llm_call, "batch", tenant=f"school_{i % 3}"))
+        for i in range(BATCH_REQUESTS)
+    ]
+
+    student_latencies = []
+
+    async def student(index):
+        await asyncio.sleep(index * 0.05)
+        start = time.monotonic()
+        await asyncio.gather(*[
+            scheduler.submit(fake_llm_call, interactive_class, tenant=f"school_{index % 3}")
+            for _ in range(CALLS_PER_STUDENT)
+        ])
+        student_latencies.append(time.monotonic() - start)
+
+    start = time.monotonic()
+    await asyncio.gather(*[student(i) for i in range(INTERACTIVE_STUDENTS)])
+    await asyncio.gather(*batch)
+    total = time.monotonic() - start
+
+    student_latencies.sort()
+    p95 = student_latencies[int(0.95 * (len(student_latencies) - 1))]
+    stats = scheduler.stats()
+    return p95, stats[interactive_class]["wait_p95"], stats["batch"]["wait_p95"], total
+
+
+async def main():
+    scenarios = {
+        # Every request in the same FIFO class, i.e. no scheduling
+        "fifo": (LLMScheduler(CONCURRENCY, weights={"batch": 1}, max_queue_depth={"batch": 10_000}), "batch"),
+        "weighted_fair": (LLMScheduler(CONCURRENCY, max_queue_depth={"batch": 10_000}), "interactive"),
+        "strict_priority": (LLMScheduler(CONCURRENCY, max_queue_depth={"batch": 10_000}, strict_priority=True), "interactive"),
+    }
+
+    print(f"{'scheduler':<18}{'student p95':>13}{'interactive wait p95':>22}{'batch wait p95':>16}{'total':>9}")
+    for name, (scheduler, interactive_class) in scenarios.items():
+        p95, interactive_wait, batch_wait, total = await run_scenario(scheduler, interactive_class)
+        print(f"{name:<18}{p95:>12.2f}s{interactive_wait:>21.3f}s{batch_wait:>15.2f}s{total:>8.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the compact dump_json path of schemas.py against the per-object
+model_validate_json + model_dump() + json.dump(indent=2) path on 10k results.
+
+Synthetic results reuse the Feedback sentences of validation_results/, so the
+payloads have realistic Korean text and sizes.
+"""
+import glob
+import json
+import os
+import random
+import time
+
+from schemas import VALIDATION_TYPES, ValidationOutput, dump_json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def synthetic_contents(n_results: int = 10_000, seed: int = 0):
+    """Raw JSON responses, as they arrive from the model or a batch output file."""
+    feedbacks = []
+    for path in glob.glob(os.path.join(BASE_DIR, "validation_results", "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            feedbacks.extend(json.load(f)["Feedbacks"])
+    rng = random.Random(seed)
+    return [
+        json.dumps({
+            "type": rng.choice(VALIDATION_TYPES),
+            "Feedbacks": rng.sample(feedbacks, rng.randint(0, 10)),
+        }, ensure_ascii=False)
+        for _ in range(n_results)
+    ]
+
+
+def per_object(contents):
+    """Today's path: validate each response, then model_dump() + json.dump(indent=2) it."""
+    results = [ValidationOutput.model_validate_json(content) for content in contents]
+    return [json.dumps(result.model_dump(), ensure_ascii=False, indent=2).encode("utf-8") for result in results]
+
+
+def per_object_compact(contents):
+    """Per-result files as batch_mode.scatter_results now writes them."""
+    return [dump_json(ValidationOutput.model_validate_json(content)) for content in contents]
+
+
+def timed(fn, contents, repeats: int = 3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = fn(contents)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main(n_results: int = 10_000):
+    contents = synthetic_contents(n_results)
+    total_bytes = sum(len(content.encode("utf-8")) for content in contents)
+    print(f"Results: {len(contents)} ValidationOutputs, {total_bytes / 2**20:.1f} MiB of raw JSON\n")
+
+    baseline, pretty = timed(per_object, contents)
+    print(f"Per-object validate + model_dump + json.dump(indent=2) : {baseline * 1000:8.1f} ms "
+          f"({sum(map(len, pretty)) / 2**20:.1f} MiB)")
+
+    compact, per_result = timed(per_object_compact, contents)
+    print(f"Per-object validate + dump_json (compact bytes)        : {compact * 1000:8.1f} ms "
+          f"({sum(map(len, per_result)) / 2**20:.1f} MiB)")
+
+    print(f"\nThroughput: {n_results / baseline:,.0f} -> {n_results / compact:,.0f} results/s "
+          f"({baseline / compact:.1f}x)")
+
+    assert [json.loads(item) for item in per_result] == [json.loads(item) for item in pretty]
+
+
+if __name__ == "__main__":
+    main()
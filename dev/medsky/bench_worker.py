@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Compare cold start and per-job overhead of the script-per-run model with the
+long-lived worker on analyze jobs (split, 3 extractions, 15 validations, save).
+
+Both sides use the same stub LLM client, which replays the park golden results
+(validation_results/ and *_parsed.json) without network calls, so the numbers
+cover process startup, imports, client construction and the local work of a
+real job (pydantic validation, provenance, JSON output), not provider latency.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+from schemas import EXTRACTION_MODELS, EXTRACTION_SECTIONS, VALIDATION_TYPES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARSED_TEXT = os.path.join(BASE_DIR, "file/park/park_sample_parsed.txt")
+SECTION_FILES = {
+    'creative_activities': os.path.join(BASE_DIR, "file/park/1_creative_activities"),
+    'academic_development': os.path.join(BASE_DIR, "file/park/2_academic_development"),
+    'detailed_abilities': os.path.join(BASE_DIR, "file/park/3_detailed_abilities"),
+}
+EXTRACTION_MODEL_SECTIONS = {EXTRACTION_MODELS[section_type].__name__: section
+                             for section, section_type in EXTRACTION_SECTIONS.items()}
+
+
+def install_stub_client():
+    """Replace clients.get_openai_client with a client that replays the golden results."""
+    import clients
+
+    with open(PARSED_TEXT, "r", encoding="utf-8") as f:
+        parsed_text = f.read()
+    starts = {}
+    for section, stem in SECTION_FILES.items():
+        with open(f"{stem}.txt", "r", encoding="utf-8") as f:
+            starts[section] = f.read()[:200].strip()
+
+    def section_of(messages):
+        text = next(m["content"] for m in messages if m["role"] == "user" and m["content"] in parsed_text)
+        return next(section for section, head in starts.items() if text.strip().startswith(head[:50]))
+
+    async def create(model, messages, response_format, **kwargs):
+        section = section_of(messages)
+        name = response_format["json_schema"]["name"]
+        if name in EXTRACTION_MODEL_SECTIONS:
+            path = f"{SECTION_FILES[EXTRACTION_MODEL_SECTIONS[name]]}_parsed.json"
+        else:
+            validation_type = next(t for t in VALIDATION_TYPES
+                                   if f'"type": "{t}"' in messages[0]["content"] + messages[-1]["content"])
+            path = os.path.join(BASE_DIR, "validation_results", f"{section}_{validation_type}.json")
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message, finish_reason="stop")],
+            usage=None,
+        )
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    client.with_options = lambda **options: client
+    clients.get_openai_client = lambda: client
+
+
+def run_script_job(output_dir: str):
+    """One job the way every exp script runs today: eager imports and clients, then the work."""
+    import importlib.util
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    import pydantic  # noqa: F401
+    from openai import AsyncOpenAI
+    if importlib.util.find_spec("llama_cloud_services"):
+        import llama_cloud_services  # noqa: F401
+    AsyncOpenAI(api_key=os.getenv("OPENROUTER_API_KEY"), base_url=os.getenv("OPENROUTER_BASE_URL"))
+
+    install_stub_client()
+    import whole_flow
+
+    with open(PARSED_TEXT, "r", encoding="utf-8") as f:
+        parsed_text = f.read()
+    analysis = asyncio.run(whole_flow.analyze_student(parsed_text))
+    whole_flow.save_analysis(analysis, output_dir)
+
+
+def _env():
+    env = dict(os.environ)
+    # Constructing the client needs a key but makes no request
+    env.setdefault("OPENROUTER_API_KEY", "benchmark")
+    return env
+
+
+def bench_script_per_run(n_jobs: int, output_root: str):
+    timings = []
+    for i in range(n_jobs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, __file__, "--script-job", os.path.join(output_root, f"script_{i}")],
+                       check=True, env=_env(), stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_worker(n_jobs: int, output_root: str):
+    jobs = "".join(
+        json.dumps({"job_id": f"job_{i}", "parsed_text_path": PARSED_TEXT,
+                    "output_dir": os.path.join(output_root, f"worker_{i}")}) + "\n"
+        for i in range(n_jobs)
+    )
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--worker", "--max-jobs", "0"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=_env(), text=True,
+    )
+    proc.stdin.write(jobs)
+    proc.stdin.close()
+
+    first_result = None
+    results = []
+    for line in proc.stdout:
+        if not line.startswith("{"):
+            continue  # Progress prints of the pipeline
+        if first_result is None:
+            first_result = time.perf_counter() - start
+        results.append(json.loads(line))
+    proc.wait()
+    total = time.perf_counter() - start
+    assert all(r["status"] == "ok" and r["complete"] for r in results), results[:1]
+    return first_result, total, [r["elapsed"] for r in results]
+
+
+def main(n_jobs: int = 20):
+    print(f"{n_jobs} analyze jobs on {os.path.basename(PARSED_TEXT)} with a stub LLM client\n")
+
+    with tempfile.TemporaryDirectory() as output_root:
+        script_timings = bench_script_per_run(n_jobs, output_root)
+        first, total, per_job = bench_worker(n_jobs, output_root)
+
+    print("Script per run")
+    print(f"  cold start + job (median) : {statistics.median(script_timings) * 1000:8.1f} ms")
+    print(f"  total                     : {sum(script_timings) * 1000:8.1f} ms")
+    print("Long-lived worker")
+    print(f"  cold start to first result: {first * 1000:8.1f} ms")
+    print(f"  first job                 : {per_job[0] * 1000:8.1f} ms")
+    print(f"  warm job (median)         : {statistics.median(per_job[1:] or per_job) * 1000:8.1f} ms")
+    print(f"  total                     : {total * 1000:8.1f} ms")
+    print(f"\nSpeedup for {n_jobs} jobs: {sum(script_timings) / total:.1f}x")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BASE_DIR)
+    if sys.argv[1:2] == ["--script-job"]:
+        run_script_job(sys.argv[2])
+    elif sys.argv[1:2] == ["--worker"]:
+        install_stub_client()
+        import worker
+        sys.argv = [os.path.join(BASE_DIR, "worker.py")] + sys.argv[2:]
+        worker.main()
+    else:
+        main()
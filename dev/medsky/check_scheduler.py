@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Regression checks for scheduler.py: dispatch order, tenant rotation, admission
+and cancellation. Plain asserts, no API calls; run with
+
+    python check_scheduler.py
+"""
+import asyncio
+
+from scheduler import LLMScheduler, QueueFullError, scheduler_from_options
+
+
+async def _served_order(scheduler: LLMScheduler, requests):
+    """
+    Queue requests behind a blocker holding the only slot, release it and
+    return the tags in the order they were dispatched.
+    """
+    gate = asyncio.Event()
+    served = []
+
+    async def blocker():
+        await gate.wait()
+
+    def tagged(tag):
+        async def call():
+            served.append(tag)
+        return call
+
+    tasks = [asyncio.create_task(scheduler.submit(blocker, "batch"))]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(scheduler.submit(tagged(tag), job_class, tenant))
+              for tag, job_class, tenant in requests]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*tasks)
+    return served
+
+
+def _mixed_requests():
+    return ([(f"b{i}", "batch", "default") for i in range(3)]
+            + [(f"i{i}", "interactive", "default") for i in range(4)])
+
+
+async def check_strict_priority():
+    scheduler = LLMScheduler(1, weights={"interactive": 2, "batch": 1}, strict_priority=True)
+    served = await _served_order(scheduler, _mixed_requests())
+    assert served == ["i0", "i1", "i2", "i3", "b0", "b1", "b2"], served
+
+
+async def check_weighted_fair():
+    # Batch holds the slot first (pass 1.0); interactive rejoins at 1.0 and wins
+    # ties, then gets two dispatches for every batch one
+    scheduler = LLMScheduler(1, weights={"interactive": 2, "batch": 1})
+    served = await _served_order(scheduler, _mixed_requests())
+    assert served == ["i0", "b0", "i1", "i2", "b1", "i3", "b2"], served
+
+
+async def check_tenant_round_robin():
+    scheduler = LLMScheduler(1)
+    served = await _served_order(scheduler, [("a0", "batch", "a"), ("a1", "batch", "a"),
+                                             ("a2", "batch", "a"), ("b0", "batch", "b")])
+    assert served == ["a0", "b0", "a1", "a2"], served
+
+
+async def check_cancelled_waiters_free_their_place():
+    scheduler = LLMScheduler(1, max_queue_depth={"batch": 2})
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    async def noop():
+        return "ok"
+
+    running = asyncio.create_task(scheduler.submit(blocker, "batch"))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(scheduler.submit(noop, "batch")) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["batch"]["queued"] == 2
+
+    try:
+        await scheduler.submit(noop, "batch")
+    except QueueFullError:
+        pass
+    else:
+        raise AssertionError("a full queue must reject new requests")
+
+    for task in queued:
+        task.cancel()
+    await asyncio.gather(*queued, return_exceptions=True)
+    assert scheduler.stats()["batch"]["queued"] == 0
+
+    # The freed places admit new requests, which run once the slot is released
+    admitted = asyncio.create_task(scheduler.submit(noop, "batch"))
+    await asyncio.sleep(0)
+    gate.set()
+    assert await admitted == "ok"
+    await running
+    stats = scheduler.stats()["batch"]
+    assert (stats["queued"], stats["running"], stats["completed"], stats["rejected"]) == (0, 0, 2, 1), stats
+
+
+async def check_unknown_job_class():
+    scheduler = LLMScheduler(1, weights={"interactive": 1})
+
+    async def noop():
+        pass
+
+    try:
+        await scheduler.submit(noop, "batch")
+    except ValueError as e:
+        assert "batch" in str(e)
+    else:
+        raise AssertionError("an unknown job class must raise ValueError")
+
+    try:
+        scheduler_from_options(weights="interactive=4")
+    except ValueError as e:
+        assert "batch" in str(e)
+    else:
+        raise AssertionError("weights without a batch share must be rejected")
+
+
+def main():
+    for check in (check_strict_priority, check_weighted_fair, check_tenant_round_robin,
+                  check_cancelled_waiters_free_their_place, check_unknown_job_class):
+        asyncio.run(check())
+        print(f"✅ {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
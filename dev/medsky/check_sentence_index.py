@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Regression checks for sentence_index.py: table rows against wrapped prose,
+sentence boundaries and offsets. Plain asserts, no API calls; run with
+
+    python check_sentence_index.py
+"""
+import os
+
+from sentence_index import SentenceIndex, segment_sentences
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _sentences(text: str):
+    return [text[start:end] for start, end in segment_sentences(text)]
+
+
+def check_table_rows():
+    text = ("[1학년]\n"
+            "       국어           국어           4    82/69.2(13.6)         A(326)    3\n"
+            "       수학           수학           4    74/60.7(20.1)         B(326)    4\n"
+            "1      한국사          한국사          3    76/69.3(17.2)         A(326)    4")
+    assert _sentences(text) == [
+        "[1학년]",
+        "국어           국어           4    82/69.2(13.6)         A(326)    3",
+        "수학           수학           4    74/60.7(20.1)         B(326)    4",
+        "1      한국사          한국사          3    76/69.3(17.2)         A(326)    4",
+    ]
+
+
+def check_wrapped_prose():
+    # Single newlines inside prose do not end a sentence, dates are not sentence ends,
+    # and a row whose last cell is long prose stays part of its sentence
+    text = ("자율활동    34    학생회에서 매 정기고사 전 운영한 멘토·멘티 활동에 성실히 참여함. 나눔과 협력의\n"
+            "                 가치를 바탕으로 문제 해결 능력을 함양함(2회/2024.04.11.-2024.12.13.). 영국 멘\n"
+            "                 토와 함께 탐색 활동에 참여함.")
+    sentences = _sentences(text)
+    assert len(sentences) == 3, sentences
+    assert sentences[0].startswith("자율활동") and sentences[0].endswith("참여함.")
+    assert "\n" in sentences[1] and sentences[1].endswith("(2회/2024.04.11.-2024.12.13.).")
+    assert sentences[2].startswith("영국 멘\n") and sentences[2].endswith("참여함.")
+
+
+def check_blank_lines_and_headings():
+    # Numbered titles are not sentence ends; a short heading ends at its newline
+    text = "7. 교과학습발달상황\n\n세부능력 및 특기사항\n수학: 탐구 보고서를 작성함\n\n다음 문단입니다."
+    assert _sentences(text) == ["7. 교과학습발달상황", "세부능력 및 특기사항", "수학: 탐구 보고서를 작성함", "다음 문단입니다."]
+
+
+def check_park_sections():
+    indexes = {}
+    for stem, expected in (("1_creative_activities", 60), ("2_academic_development", 22),
+                           ("3_detailed_abilities", 117)):
+        with open(os.path.join(BASE_DIR, "file/park", f"{stem}.txt"), "r", encoding="utf-8") as f:
+            text = f.read()
+        index = indexes[stem] = SentenceIndex(text)
+        assert len(index) == expected, (stem, len(index))
+        for sentence_id in range(1, len(index) + 1):
+            start, end = index.span(sentence_id)
+            assert index.sentence(sentence_id) == text[start:end]
+        assert 0 not in index and len(index) + 1 not in index
+
+    # Every grade row of the academic table is its own sentence
+    for row in ("국어           국어           4    82/69.2(13.6)         A(326)    3",
+                "수학           수학           4    74/60.7(20.1)         B(326)    4",
+                "1      한국사          한국사          3    76/69.3(17.2)         A(326)    4"):
+        assert row in indexes["2_academic_development"].sentences, row
+
+    # The 특기사항 prose of creative activities keeps its wrapped lines in one sentence
+    creative = indexes["1_creative_activities"].sentences
+    assert "학생회에서 매 정기고사 전 운영한 멘토·멘티 활동에 성실히 참여함." in creative
+    assert any(s.startswith("나눔과 협력의\n") and "문제" in s for s in creative)
+
+
+def main():
+    for check in (check_table_rows, check_wrapped_prose, check_blank_lines_and_headings, check_park_sections):
+        check()
+        print(f"✅ {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
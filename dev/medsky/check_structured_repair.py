@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Regression checks for structured_repair.py: the edge cases the repair state
+machine was built for. Plain asserts, run with
+
+    python check_structured_repair.py
+"""
+import json
+
+from schemas import Feedback, ValidationOutput
+from structured_repair import RepairError, remaining_text, repair_json, salvage_items
+
+
+def check_unescaped_quotes():
+    raw = '{"type": "red_line", "Feedbacks": [{"sentence": "그는 "왜"라고 물었다.", "feedback": "a, "b" c"}]}'
+    repaired = repair_json(raw)
+    assert not repaired.truncated
+    assert "unescaped_quote" in repaired.repairs
+    assert repaired.data["Feedbacks"][0] == {"sentence": '그는 "왜"라고 물었다.', "feedback": 'a, "b" c'}
+
+    # A quote followed by ', "' that is not a key is still inside the string
+    raw = '{"type": "red_line", "Feedbacks": [{"sentence": "A "B", "C" 순서", "feedback": "f"}]}'
+    assert repair_json(raw).data["Feedbacks"][0]["sentence"] == 'A "B", "C" 순서'
+
+
+def check_trailing_commas_and_raw_newlines():
+    raw = '{"type": "red_line", "Feedbacks": [{"sentence": "첫 줄\n둘째 줄", "feedback": "f",},],}'
+    repaired = repair_json(raw)
+    assert "trailing_comma" in repaired.repairs
+    assert repaired.data["Feedbacks"] == [{"sentence": "첫 줄\n둘째 줄", "feedback": "f"}]
+
+
+def check_truncation():
+    complete = {"type": "blue_line", "Feedbacks": [
+        {"sentence": "문장 하나.", "feedback": "근거 하나"},
+        {"sentence": "문장 둘.", "feedback": "근거 둘"},
+    ]}
+    text = json.dumps(complete, ensure_ascii=False)
+
+    # Cut inside the second item's string: the open item is closed empty and
+    # dropped by salvage_items, so only the first, fully formed item survives
+    cut = text[:text.index("문장 둘") + 2]
+    repaired = repair_json(cut)
+    assert repaired.truncated and "truncated" in repaired.repairs
+    assert repaired.data["type"] == "blue_line"
+    assert salvage_items(repaired.data, "Feedbacks", Feedback) == [Feedback(**complete["Feedbacks"][0])]
+
+    # Cut right after a comma between items
+    cut = text[:text.index('{"sentence": "문장 둘')]
+    repaired = repair_json(cut)
+    assert repaired.truncated
+    assert repaired.data["Feedbacks"] == [complete["Feedbacks"][0]]
+
+    # Complete output is not reported as truncated, even with items that fail validation
+    data = {"type": "blue_line", "Feedbacks": [complete["Feedbacks"][0], {"sentence": "x"}]}
+    repaired = repair_json(json.dumps(data, ensure_ascii=False))
+    assert not repaired.truncated
+    assert salvage_items(repaired.data, "Feedbacks", Feedback) == [Feedback(**complete["Feedbacks"][0])]
+
+
+def check_surrounding_prose():
+    body = '{"type": "red_check", "Feedbacks": []}'
+    for raw in (f"```json\n{body}\n```", f"결과입니다: {body} 이상입니다.", f"결과: [참고] {body}"):
+        repaired = repair_json(raw)
+        assert ValidationOutput.model_validate(repaired.data).type == "red_check", raw
+        assert not repaired.truncated, raw
+
+    try:
+        repair_json("JSON을 생성할 수 없습니다.")
+    except RepairError:
+        pass
+    else:
+        raise AssertionError("text without JSON must raise RepairError")
+
+
+def check_remaining_text():
+    text = "첫 문장입니다.\n둘째   문장입니다. 셋째 문장입니다."
+    assert remaining_text(text, ["둘째 문장입니다."]) == " 셋째 문장입니다."
+    assert remaining_text(text, ["없는 문장"]) is None
+
+
+def main():
+    for check in (check_unescaped_quotes, check_trailing_commas_and_raw_newlines, check_truncation,
+                  check_surrounding_prose, check_remaining_text):
+        check()
+        print(f"✅ {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Lazily created, process-wide API clients
+
+Clients are built on first use instead of at import time, so importing a stage
+module is cheap and a long-lived worker reuses the same warm connections.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_openai_client = None
+_llama_parser = None
+
+
+def get_openai_client():
+    """Return the shared AsyncOpenAI client for OpenRouter, creating it on first use."""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(
+            api_key=os.getenv("OPENROUTER_API_KEY"),
+            base_url=os.getenv("OPENROUTER_BASE_URL"),
+        )
+    return _openai_client
+
+
+def get_llama_parser():
+    """Return the shared LlamaParse parser, creating it on first use."""
+    global _llama_parser
+    if _llama_parser is None:
+        from llama_cloud_services import LlamaParse
+
+        _llama_parser = LlamaParse(
+            api_key=os.getenv("LLAMA_API_KEY"),
+            parse_mode="parse_page_without_llm",
+            high_res_ocr=True,
+            outlined_table_extraction=True,
+            output_tables_as_HTML=True
+        )
+    return _llama_parser
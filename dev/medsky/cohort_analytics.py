@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized cohort analytics over AcademicTable columns
+
+Every function works on whole columns at once, so a cohort of thousands of
+students is processed without a Python loop over rows.
+"""
+from typing import Dict
+
+import numpy as np
+
+from academic_table import AcademicTable
+
+
+def _grouped_weighted_mean(groups: np.ndarray, values: np.ndarray, weights: np.ndarray, n_groups: int) -> np.ndarray:
+    """Weighted mean of values per group, ignoring NaN values. NaN for empty groups."""
+    valid = ~np.isnan(values)
+    w = np.where(valid, weights, 0.0)
+    totals = np.bincount(groups, weights=np.where(valid, values, 0.0) * w, minlength=n_groups)
+    denominators = np.bincount(groups, weights=w, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominators > 0, totals / denominators, np.nan)
+
+
+def weighted_gpa(table: AcademicTable) -> np.ndarray:
+    """
+    Credit-weighted average 석차등급 per student.
+
+    Rows without a rank grade (e.g. 과학탐구실험) are left out.
+
+    Args:
+        table (AcademicTable): The cohort table
+
+    Returns:
+        np.ndarray: One GPA per student, indexed like table.student_ids
+    """
+    return _grouped_weighted_mean(table.student, table.grade, table.credits, table.n_students)
+
+
+def z_scores(table: AcademicTable) -> np.ndarray:
+    """
+    Standardized score of every row against its own subject mean and stddev.
+
+    Returns:
+        np.ndarray: One z-score per row, NaN when stddev is missing or zero
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(table.std > 0, (table.raw - table.mean) / table.std, np.nan)
+
+
+def subject_percentiles(table: AcademicTable) -> np.ndarray:
+    """
+    Percentile rank (0-100) of each row's raw score among the cohort rows of
+    the same subject and semester. Ties count as half below.
+
+    Returns:
+        np.ndarray: One percentile per row, NaN when the raw score is missing
+    """
+    n_semesters = int(table.semester.max()) + 1 if len(table) else 1
+    group = table.subject.astype(np.int64) * n_semesters + table.semester
+    raw = table.raw.astype(np.float64)
+    valid = ~np.isnan(raw)
+
+    # Raw scores are 0-100, so one float key keeps groups apart and sorts scores within them
+    span = 1000.0
+    keys = group * span + np.where(valid, raw, 0.0)
+    sorted_keys = np.sort(keys[valid])
+
+    below = np.searchsorted(sorted_keys, keys, side="left")
+    upto = np.searchsorted(sorted_keys, keys, side="right")
+    group_start = np.searchsorted(sorted_keys, group * span, side="left")
+    group_end = np.searchsorted(sorted_keys, (group + 1) * span, side="left")
+    size = group_end - group_start
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentile = (below - group_start + 0.5 * (upto - below)) / size * 100.0
+    return np.where(valid & (size > 0), percentile, np.nan)
+
+
+def semester_trends(table: AcademicTable) -> Dict[str, np.ndarray]:
+    """
+    Credit-weighted 석차등급 per student and semester, plus the per-student trend.
+
+    Returns:
+        dict: 'by_semester' is an (n_students, n_semesters) matrix of GPAs and
+        'slope' is the least-squares change in GPA per semester (negative means
+        improving, since lower 등급 is better). NaN where there is too little data.
+    """
+    n_semesters = int(table.semester.max()) + 1 if len(table) else 1
+    cell = table.student.astype(np.int64) * n_semesters + table.semester
+    by_semester = _grouped_weighted_mean(
+        cell, table.grade, table.credits, table.n_students * n_semesters
+    ).reshape(table.n_students, n_semesters)
+
+    x = np.arange(n_semesters, dtype=np.float64)
+    observed = ~np.isnan(by_semester)
+    counts = observed.sum(axis=1)
+    x_obs = np.where(observed, x, 0.0)
+    y_obs = np.where(observed, by_semester, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = x_obs.sum(axis=1) / counts
+        y_mean = y_obs.sum(axis=1) / counts
+        dx = np.where(observed, x - x_mean[:, None], 0.0)
+        dy = np.where(observed, by_semester - y_mean[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    slope = np.where(counts >= 2, slope, np.nan)
+
+    return {"by_semester": by_semester, "slope": slope}
+
+
+def analyze_cohort(table: AcademicTable) -> Dict[str, np.ndarray]:
+    """
+    Compute every cohort metric in one pass over the table.
+
+    Args:
+        table (AcademicTable): The cohort table
+
+    Returns:
+        dict: Per-student 'gpa', 'gpa_by_semester' and 'gpa_slope', and per-row
+        'z_score' and 'percentile'
+    """
+    trends = semester_trends(table)
+    return {
+        "gpa": weighted_gpa(table),
+        "gpa_by_semester": trends["by_semester"],
+        "gpa_slope": trends["slope"],
+        "z_score": z_scores(table),
+        "percentile": subject_percentiles(table),
+    }
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Per-job deadlines shared by the orchestrator and every extraction/validation call
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot finish before the job deadline."""
+
+
+class Deadline:
+    """
+    An absolute point in time by which a job must finish.
+
+    The same Deadline object is passed from the orchestrator down into every
+    LLM call, which uses remaining() as its per-request timeout.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = "call"):
+        """Raise DeadlineExceeded if the deadline has already passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"{what} skipped: {self.timeout:.1f}s job deadline exceeded")
+
+    async def run(self, coro, what: str = "call", grace: float = 0.0):
+        """
+        Await a coroutine, cancelling it if it would run past the deadline.
+
+        Args:
+            coro: The coroutine to await
+            what (str): Label used in the error message
+            grace (float): Extra seconds before cancelling, so a coroutine whose own
+                requests are bounded by the deadline can still return a partial result
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            DeadlineExceeded: If the deadline passes first
+        """
+        try:
+            return await asyncio.wait_for(coro, timeout=self.remaining() + grace)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"{what} cancelled: {self.timeout:.1f}s job deadline exceeded") from e
+
+
+def request_client(client, deadline: Optional[Deadline]):
+    """
+    The client to send a request made under a deadline with.
+
+    The SDK retries a timed-out request with the same timeout (max_retries=2 by
+    default), so one request could run for about three times the time left and be
+    hard-cancelled by Deadline.run, losing whatever the caller had salvaged. Under
+    a deadline SDK retries are turned off; the callers retry within the deadline.
+    """
+    if deadline is None:
+        return client
+    return client.with_options(max_retries=0)
+
+
+def request_options(deadline: Optional[Deadline]) -> dict:
+    """
+    Extra keyword arguments for an OpenAI request made under a deadline.
+
+    Without a deadline nothing is passed, so the client's default timeout applies.
+    """
+    if deadline is None:
+        return {}
+    deadline.check()
+    return {"timeout": deadline.remaining()}
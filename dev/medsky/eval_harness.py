@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Accuracy-under-optimization regression harness
+
+Runs pipeline configurations over fixture students and reports, in one table,
+per-type precision/recall of the flagged sentences against golden validation
+results, field-level accuracy of the extractions against golden *_parsed.json,
+wall-clock latency and token usage.
+
+The first fixture is the park sample with the 15 files in validation_results/.
+Configurations:
+    golden          replays the golden files (sanity check, always 1.00)
+    results:<dir>   scores results already on disk, e.g. a batch_mode output directory
+                    (absent files are reported in the "missing" column)
+    <layout>[/<mode>]  live pipeline with a prompt layout (system_first, shared_prefix)
+                       and validation mode (verbatim by default, or indexed)
+
+Usage:
+    python eval_harness.py system_first system_first/indexed shared_prefix/indexed
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from schemas import ERROR_FEEDBACK_SENTENCE, EXTRACTION_SECTIONS, VALIDATION_TYPES
+from usage_stats import reset_usage, usage_summary
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TYPE_ABBREVIATIONS = {"blue_highlight": "bh", "red_line": "rl", "blue_line": "bl", "black_line": "kl", "red_check": "rc"}
+
+
+@dataclass
+class Fixture:
+    name: str
+    section_files: Dict[str, str]
+    golden_validation_dir: str
+    golden_extraction_files: Dict[str, str]
+
+    def section_text(self, section: str) -> str:
+        with open(self.section_files[section], "r", encoding="utf-8") as f:
+            return f.read()
+
+    def golden_validation(self, section: str, validation_type: str) -> dict:
+        with open(os.path.join(self.golden_validation_dir, f"{section}_{validation_type}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def golden_extraction(self, section: str) -> dict:
+        with open(self.golden_extraction_files[section], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+FIXTURES = [
+    Fixture(
+        name="park",
+        section_files={
+            'creative_activities': os.path.join(BASE_DIR, "file/park/1_creative_activities.txt"),
+            'academic_development': os.path.join(BASE_DIR, "file/park/2_academic_development.txt"),
+            'detailed_abilities': os.path.join(BASE_DIR, "file/park/3_detailed_abilities.txt"),
+        },
+        golden_validation_dir=os.path.join(BASE_DIR, "validation_results"),
+        golden_extraction_files={
+            'creative_activities': os.path.join(BASE_DIR, "file/park/1_creative_activities_parsed.json"),
+            'academic_development': os.path.join(BASE_DIR, "file/park/2_academic_development_parsed.json"),
+            'detailed_abilities': os.path.join(BASE_DIR, "file/park/3_detailed_abilities_parsed.json"),
+        },
+    ),
+]
+
+
+@dataclass
+class PipelineConfig:
+    """
+    A pipeline variant under evaluation.
+
+    validate(fixture, section, text, validation_type) and extract(fixture, section, text)
+    return plain dicts shaped like ValidationOutput / the extraction models.
+    """
+    name: str
+    validate: Callable[..., Awaitable[dict]]
+    extract: Callable[..., Awaitable[dict]]
+
+
+def golden_config() -> PipelineConfig:
+    async def validate(fixture, section, text, validation_type):
+        return fixture.golden_validation(section, validation_type)
+
+    async def extract(fixture, section, text):
+        return fixture.golden_extraction(section)
+
+    return PipelineConfig("golden", validate, extract)
+
+
+def results_dir_config(results_dir: str) -> PipelineConfig:
+    """Score results written by whole_flow.save_analysis or batch_mode (results_dir/<fixture>/...)."""
+    def load(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def validate(fixture, section, text, validation_type):
+        return load(os.path.join(results_dir, fixture.name, f"{section}_{validation_type}.json"))
+
+    async def extract(fixture, section, text):
+        return load(os.path.join(results_dir, fixture.name, f"{section}_parsed.json"))
+
+    return PipelineConfig(f"results:{os.path.basename(os.path.normpath(results_dir))}", validate, extract)
+
+
+def live_config(layout: str, mode: str = "verbatim") -> PipelineConfig:
+    from exp5_validation import validate_text
+    from whole_flow import EXTRACTORS
+
+    async def validate(fixture, section, text, validation_type):
+        return (await validate_text(text, validation_type, layout=layout, mode=mode)).model_dump()
+
+    async def extract(fixture, section, text):
+        return (await EXTRACTORS[section](text)).model_dump()
+
+    return PipelineConfig(layout if mode == "verbatim" else f"{layout}/{mode}", validate, extract)
+
+
+def _normalize(sentence: str) -> str:
+    return re.sub(r'\s+', '', sentence)
+
+
+def _is_error_result(result) -> bool:
+    """True for exceptions and for the placeholder validate_text returns when every attempt failed."""
+    if isinstance(result, BaseException):
+        return True
+    feedbacks = (result or {}).get("Feedbacks") or []
+    return any(fb.get("sentence") == ERROR_FEEDBACK_SENTENCE for fb in feedbacks)
+
+
+def _flagged(result: Optional[dict]) -> set:
+    if not result:
+        return set()
+    return {_normalize(fb["sentence"]) for fb in result.get("Feedbacks", [])}
+
+
+def _field_matches(golden: dict, predicted: Optional[dict]):
+    """Count (matching, total) leaf fields, aligning list rows by position."""
+    (list_key, golden_rows), = golden.items()
+    predicted_rows = (predicted or {}).get(list_key) or []
+    matched = total = 0
+    for index in range(max(len(golden_rows), len(predicted_rows))):
+        golden_row = golden_rows[index] if index < len(golden_rows) else {}
+        predicted_row = predicted_rows[index] if index < len(predicted_rows) else {}
+        for key in set(golden_row) | set(predicted_row):
+            total += 1
+            if key in golden_row and key in predicted_row \
+                    and _normalize(str(golden_row[key])) == _normalize(str(predicted_row[key])):
+                matched += 1
+    return matched, total
+
+
+async def evaluate(config: PipelineConfig, fixtures: List[Fixture] = FIXTURES) -> dict:
+    """
+    Run one configuration over every fixture and score it.
+
+    A result the configuration does not have (a file missing from a results
+    directory) is counted under "missing" rather than scored as an empty answer,
+    so an incomplete directory cannot pass as precise.
+
+    Returns:
+        dict: per-type precision/recall, field accuracy, latency, token usage,
+        errors and missing results
+    """
+    counts = {t: {"tp": 0, "fp": 0, "fn": 0} for t in VALIDATION_TYPES}
+    fields_matched = fields_total = 0
+    errors = missing = 0
+
+    reset_usage()
+    start = time.perf_counter()
+    for fixture in fixtures:
+        texts = {section: fixture.section_text(section) for section in EXTRACTION_SECTIONS}
+        pairs = [(section, t) for section in EXTRACTION_SECTIONS for t in VALIDATION_TYPES]
+        results = await asyncio.gather(
+            *[config.validate(fixture, section, texts[section], t) for section, t in pairs],
+            *[config.extract(fixture, section, texts[section]) for section in EXTRACTION_SECTIONS],
+            return_exceptions=True,
+        )
+
+        for (section, validation_type), result in zip(pairs, results[:len(pairs)]):
+            if result is None:
+                missing += 1
+            elif _is_error_result(result):
+                errors += 1
+                result = None
+            golden = _flagged(fixture.golden_validation(section, validation_type))
+            predicted = _flagged(result)
+            counts[validation_type]["tp"] += len(golden & predicted)
+            counts[validation_type]["fp"] += len(predicted - golden)
+            counts[validation_type]["fn"] += len(golden - predicted)
+
+        for section, result in zip(EXTRACTION_SECTIONS, results[len(pairs):]):
+            if result is None:
+                missing += 1
+            elif isinstance(result, BaseException):
+                errors += 1
+                result = None
+            matched, total = _field_matches(fixture.golden_extraction(section), result)
+            fields_matched += matched
+            fields_total += total
+    latency = time.perf_counter() - start
+
+    per_type = {}
+    for validation_type, c in counts.items():
+        per_type[validation_type] = {
+            "precision": c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 1.0,
+            "recall": c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 1.0,
+        }
+    usage = usage_summary().values()
+    return {
+        "config": config.name,
+        "per_type": per_type,
+        "field_accuracy": fields_matched / fields_total if fields_total else 1.0,
+        "latency": latency,
+        "prompt_tokens": sum(row["prompt_tokens"] for row in usage),
+        "cached_tokens": sum(row["cached_tokens"] for row in usage),
+        "completion_tokens": sum(row["completion_tokens"] for row in usage),
+        "errors": errors,
+        "missing": missing,
+    }
+
+
+def print_report(reports: List[dict]):
+    type_headers = "".join(f"{TYPE_ABBREVIATIONS[t] + ' P/R':>12}" for t in VALIDATION_TYPES)
+    header = f"{'config':<22}{type_headers}{'fields':>8}{'latency':>9}{'prompt':>9}{'cached':>9}{'output':>9}{'errors':>7}{'missing':>8}"
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        cells = "".join(
+            f"{report['per_type'][t]['precision']:>7.2f}/{report['per_type'][t]['recall']:.2f}"
+            for t in VALIDATION_TYPES
+        )
+        print(f"{report['config']:<22}{cells}{report['field_accuracy']:>8.2f}{report['latency']:>8.1f}s"
+              f"{report['prompt_tokens']:>9}{report['cached_tokens']:>9}{report['completion_tokens']:>9}{report['errors']:>7}{report['missing']:>8}")
+    print("\n" + ", ".join(f"{abbr}={t}" for t, abbr in TYPE_ABBREVIATIONS.items()))
+
+
+def build_config(name: str) -> PipelineConfig:
+    if name == "golden":
+        return golden_config()
+    if name.startswith("results:"):
+        return results_dir_config(name.split(":", 1)[1])
+    layout, _, mode = name.partition("/")
+    return live_config(layout, mode or "verbatim")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Score pipeline configurations against golden results")
+    parser.add_argument("configs", nargs="*", default=["golden"])
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    reports = [await evaluate(build_config(name)) for name in args.configs]
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
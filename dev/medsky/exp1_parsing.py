@@ -2,6 +2,7 @@ from llama_cloud_services import LlamaParse
 import os 
 from dotenv import load_dotenv
 import json 
+from provenance import PageMap
 
 load_dotenv()
 
@@ -19,6 +20,14 @@ file_path = "dev/medsky/file/park/park_sample.pdf"
 
 result = parser.parse(file_path)
 
-for page in result.pages:
-    with open("dev/file/park_sample_parsed.txt", "a") as f:
-        f.write(page.text)
\ No newline at end of file
+page_texts = [page.text for page in result.pages]
+page_numbers = [getattr(page, "page", i + 1) for i, page in enumerate(result.pages)]
+
+# Written once from this run's pages, so the page map below matches the file exactly
+with open("dev/file/park_sample_parsed.txt", "w", encoding="utf-8") as f:
+    f.write("".join(page_texts))
+
+# Page and line offsets of the concatenated text, used to trace Feedback back to the PDF
+page_map = PageMap.from_pages(page_texts, page_numbers)
+with open("dev/file/park_sample_pages.json", "w") as f:
+    json.dump(page_map.to_dict(), f)
\ No newline at end of file
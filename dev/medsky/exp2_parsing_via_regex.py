@@ -2,6 +2,79 @@
 import re
 import os
 
+SECTION_PATTERNS = {
+    # Pattern to match from "6. 창의적 체험활동상황" to "7. 교과학습발달상황"
+    'creative_activities': r'6\.\s*창의적\s*체험활동상황.*?(?=7\.\s*교과학습발달상황)',
+    # Pattern to match from "7. 교과학습발달상황" to first "세부능력 및 특기사항"
+    'academic_development': r'7\.\s*교과학습발달상황.*?(?=세부능력\s*및\s*특기사항)',
+    # Pattern to match from first "세부능력 및 특기사항" to "8. 독서활동상황"
+    'detailed_abilities': r'세부능력\s*및\s*특기사항.*?(?=8\.\s*독서활동상황)',
+    # Pattern to match from "8. 독서활동상황" to "9. 행동특성 및 종합의견"
+    'reading_activities': r'8\.\s*독서활동상황.*?(?=9\.\s*행동특성\s*및\s*종합의견)',
+    # Pattern to match from "9. 행동특성 및 종합의견" to end of file
+    'behavioral_characteristics': r'9\.\s*행동특성\s*및\s*종합의견.*',
+}
+
+def locate_section(content, section):
+    """
+    Find one section in the full parsed text of a student record, keeping its position.
+    
+    Args:
+        content (str): The full parsed student record text
+        section (str): One of the SECTION_PATTERNS keys
+    
+    Returns:
+        tuple: (section text, offset of the section in content), ("", -1) if not found
+    """
+    match = re.search(SECTION_PATTERNS[section], content, re.DOTALL)
+    
+    if match:
+        raw = match.group(0)
+        text = raw.strip()
+        return text, match.start() + (len(raw) - len(raw.lstrip()))
+    else:
+        return "", -1
+
+def extract_section(content, section):
+    """
+    Extract one section from the full parsed text of a student record.
+    
+    Args:
+        content (str): The full parsed student record text
+        section (str): One of the SECTION_PATTERNS keys
+    
+    Returns:
+        str: The extracted section, or "" if it was not found
+    """
+    return locate_section(content, section)[0]
+
+def split_sections(content):
+    """
+    Extract every section from the full parsed text of a student record.
+    
+    Args:
+        content (str): The full parsed student record text
+    
+    Returns:
+        dict: section name -> extracted section text
+    """
+    return {section: extract_section(content, section) for section in SECTION_PATTERNS}
+
+def split_sections_with_offsets(content):
+    """
+    Extract every section together with its offset in the full parsed text.
+    
+    Args:
+        content (str): The full parsed student record text
+    
+    Returns:
+        tuple: (section name -> section text, section name -> offset in content)
+    """
+    sections, offsets = {}, {}
+    for section in SECTION_PATTERNS:
+        sections[section], offsets[section] = locate_section(content, section)
+    return sections, offsets
+
 def parse_creative_activities(file_path):
     """
     Extract the creative activities section from a student record file.
@@ -15,15 +88,7 @@ def parse_creative_activities(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Pattern to match from "6. 창의적 체험활동상황" to "7. 교과학습발달상황"
-    pattern = r'6\.\s*창의적\s*체험활동상황.*?(?=7\.\s*교과학습발달상황)'
-    
-    match = re.search(pattern, content, re.DOTALL)
-    
-    if match:
-        return match.group(0).strip()
-    else:
-        return ""
+    return extract_section(content, "creative_activities")
 
 def parse_academic_development(file_path):
     """
@@ -38,15 +103,7 @@ def parse_academic_development(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Pattern to match from "7. 교과학습발달상황" to first "세부능력 및 특기사항"
-    pattern = r'7\.\s*교과학습발달상황.*?(?=세부능력\s*및\s*특기사항)'
-    
-    match = re.search(pattern, content, re.DOTALL)
-    
-    if match:
-        return match.group(0).strip()
-    else:
-        return ""
+    return extract_section(content, "academic_development")
 
 def parse_detailed_abilities(file_path):
     """
@@ -61,15 +118,7 @@ def parse_detailed_abilities(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Pattern to match from first "세부능력 및 특기사항" to "8. 독서활동상황"
-    pattern = r'세부능력\s*및\s*특기사항.*?(?=8\.\s*독서활동상황)'
-    
-    match = re.search(pattern, content, re.DOTALL)
-    
-    if match:
-        return match.group(0).strip()
-    else:
-        return ""
+    return extract_section(content, "detailed_abilities")
 
 def parse_reading_activities(file_path):
     """
@@ -84,15 +133,7 @@ def parse_reading_activities(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Pattern to match from "8. 독서활동상황" to "9. 행동특성 및 종합의견"
-    pattern = r'8\.\s*독서활동상황.*?(?=9\.\s*행동특성\s*및\s*종합의견)'
-    
-    match = re.search(pattern, content, re.DOTALL)
-    
-    if match:
-        return match.group(0).strip()
-    else:
-        return ""
+    return extract_section(content, "reading_activities")
 
 def parse_behavioral_characteristics(file_path):
     """
@@ -107,15 +148,7 @@ def parse_behavioral_characteristics(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Pattern to match from "9. 행동특성 및 종합의견" to end of file
-    pattern = r'9\.\s*행동특성\s*및\s*종합의견.*'
-    
-    match = re.search(pattern, content, re.DOTALL)
-    
-    if match:
-        return match.group(0).strip()
-    else:
-        return ""
+    return extract_section(content, "behavioral_characteristics")
 
 def save_parsed_sections(file_path):
     """
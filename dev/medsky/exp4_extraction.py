@@ -1,81 +1,55 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional 
-from openai import AsyncOpenAI
+from typing import Optional
 from dotenv import load_dotenv
-import os 
-from extraction_prompts import get_extraction_prompt
+from clients import get_openai_client
+from deadline import Deadline, request_client, request_options
+from request_templates import extraction_messages, response_format
+from scheduler import schedule
+from schemas import EXTRACTION_MODELS
+from usage_stats import record_usage
 import json 
 import asyncio 
+import time
 
 load_dotenv()
 
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url=os.getenv("OPENROUTER_BASE_URL"),
-)
-
-class CreativeActivity(BaseModel):
-    영역: str = Field(description="해당 창의적 체험활동상황의 영역. 영역 column of table e.g - 자율활동, 동아리활동, ...")
-    시간: int = Field(description="해당 창의적 체험활동상황의 시간. 시간 column of table")
-    특기사항: str = Field(description="해당 창의적 체험활동상황의 특기사항. 특기사항 column of table")
-
-class CreativeActivities(BaseModel):
-    창의적체험활동상황: List[CreativeActivity] = Field(description="The list of creative activities")
-
-
-class AcademicDevelopment(BaseModel):
-    과목: str = Field(description="해당 교과학습발달상황의 과목. 과목 column of table e.g - 수학, 과학, ...")
-    학점수: int = Field(description="해당 교과학습발달상황의 학점수. 학점수 column of table")
-    score_over_average: str = Field(description="해당 교과학습발달상황의 원점수/과목평균. 원점수/과목평균 column of table")
-    성취도: str = Field(description="해당 교과학습발달상황의 성취도. 성취도 column of table")
-    석차등급: str = Field(description="해당 교과학습발달상황의 석차등급. 석차등급 column of table")
-    
-
-
-class AcademicDevelopments(BaseModel):
-    교과학습발달상황: List[AcademicDevelopment] = Field(description="The list of academic developments")
-
-
-class DetailedAbility(BaseModel):
-    과목: str = Field(description="해당 세부특기사항의 과목.")
-    특기사항: str = Field(description="해당 과목의 특기사항.")
-
-class DetailedAbilities(BaseModel):
-    세부특기사항: List[DetailedAbility] = Field(description="The list of detailed abilities")
-
-
-async def parse_creative_activity(raw_text: str):
-    response = await client.chat.completions.parse(
-        model="deepseek/deepseek-chat-v3.1",
-        messages=[
-            {"role": "system", "content": get_extraction_prompt("creative")},
-            {"role": "user", "content": raw_text}
-        ],
-        response_format=CreativeActivities
-    )
-    return response.choices[0].message.parsed
-
-async def parse_academic_development(raw_text: str):
-    response = await client.chat.completions.parse(
-        model="deepseek/deepseek-chat-v3.1",
-        messages=[
-            {"role": "system", "content": get_extraction_prompt("academic")},
-            {"role": "user", "content": raw_text}
-        ],
-        response_format=AcademicDevelopments
-    )
-    return response.choices[0].message.parsed
-
-async def parse_detailed_ability(raw_text: str):
-    response = await client.chat.completions.parse(
-        model="deepseek/deepseek-chat-v3.1",
-        messages=[
-            {"role": "system", "content": get_extraction_prompt("detailed")},
-            {"role": "user", "content": raw_text}
-        ],
-        response_format=DetailedAbilities
-    )
-    return response.choices[0].message.parsed
+def build_extraction_request(section_type: str, raw_text: str) -> dict:
+    """
+    Build the chat completion request body for one extraction.
+
+    Args:
+        section_type (str): One of 'creative', 'academic', 'detailed'
+        raw_text (str): The section text to extract from
+
+    Returns:
+        dict: Keyword arguments for chat.completions.create (also used as the batch request body)
+    """
+    return {
+        "model": "deepseek/deepseek-chat-v3.1",
+        "messages": extraction_messages(raw_text, section_type),
+        "response_format": response_format(EXTRACTION_MODELS[section_type]),
+    }
+
+async def _extract(section_type: str, raw_text: str, deadline: Optional[Deadline] = None):
+    async def call():
+        start = time.perf_counter()
+        response = await request_client(get_openai_client(), deadline).chat.completions.create(
+            **build_extraction_request(section_type, raw_text),
+            **request_options(deadline)
+        )
+        record_usage(f"extraction/{section_type}", response.usage, time.perf_counter() - start)
+        return response
+
+    response = await schedule(call)
+    return EXTRACTION_MODELS[section_type].model_validate_json(response.choices[0].message.content)
+
+async def parse_creative_activity(raw_text: str, deadline: Optional[Deadline] = None):
+    return await _extract("creative", raw_text, deadline)
+
+async def parse_academic_development(raw_text: str, deadline: Optional[Deadline] = None):
+    return await _extract("academic", raw_text, deadline)
+
+async def parse_detailed_ability(raw_text: str, deadline: Optional[Deadline] = None):
+    return await _extract("detailed", raw_text, deadline)
 
 async def main():
     # Load text files
@@ -1,66 +1,334 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Literal
-from openai import AsyncOpenAI
+from pydantic import ValidationError
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 import os 
 import json 
 import asyncio 
-from validation_prompts import get_validation_prompt
+import hashlib
+import time
+from clients import get_openai_client
+from deadline import Deadline, DeadlineExceeded, request_client, request_options
+from request_templates import DEFAULT_LAYOUT, indexed_validation_messages, response_format, validation_messages
+from scheduler import QueueFullError, schedule
+from schemas import ERROR_FEEDBACK_SENTENCE, VALIDATION_TYPES, Feedback, IndexedFeedback, IndexedValidationOutput, ValidationOutput
+from sentence_index import SentenceIndex
+from structured_repair import RepairError, repair_json, remaining_text, salvage_items
+from usage_stats import record_usage
 
 load_dotenv()
 
-client = AsyncOpenAI(
-    base_url=os.getenv("OPENROUTER_BASE_URL"),
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-)
+# "verbatim": the model copies each sentence; "indexed": sentences are numbered locally and
+# the model returns only their ids, so output tokens scale with the feedback, not the text
+VALIDATION_MODES = ("verbatim", "indexed")
+DEFAULT_VALIDATION_MODE = os.getenv("MEDSKY_VALIDATION_MODE", "verbatim")
 
-class Feedback(BaseModel):
-    sentence: str = Field(description="평가된 컨텐츠에서 피드백 대상이 되는 문장. 원본 텍스트와 반드시 동일하게 작성해야 함.")
-    feedback: str = Field(description="컨텐츠에 대한 피드백. 해당 피드백을 왜 제시하게 됐는지에 대한 설명")
 
+# Directory where unparseable responses are recorded for the repair benchmark (disabled when unset)
+BAD_RESPONSE_DIR = os.getenv("MEDSKY_BAD_RESPONSE_DIR")
 
-class ValidationOutput(BaseModel):
-    type: Literal["red_line", "red_check", "blue_line", "blue_highlight", "black_line"]
-    Feedbacks: List[Feedback] = Field(description="The list of Feedbacks for the validation")
 
+def record_bad_response(content: str, validation_type: str, finish_reason: Optional[str]):
+    """Append a malformed response to the bad-response corpus, if recording is enabled."""
+    if not BAD_RESPONSE_DIR:
+        return
+    os.makedirs(BAD_RESPONSE_DIR, exist_ok=True)
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+    output_path = os.path.join(BAD_RESPONSE_DIR, f"{validation_type}_{digest}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "validation_type": validation_type,
+            "finish_reason": finish_reason,
+            "content": content,
+        }, f, ensure_ascii=False, indent=2)
 
-async def validate_text(text: str, validation_type: str, max_retries: int = 3):
+
+def salvage_validation_output(content: str, validation_type: str,
+                              output_model=ValidationOutput, item_model=Feedback):
+    """
+    Recover a ValidationOutput from malformed or truncated model output.
+
+    Args:
+        content (str): Raw message content
+        validation_type (str): The validation type that was requested
+        output_model: Response model to validate against (IndexedValidationOutput in indexed mode)
+        item_model: Model of one Feedbacks item
+
+    Returns:
+        tuple[output_model, bool] | None: The salvaged output and whether the
+        response was truncated, or None if nothing could be recovered
+    """
+    try:
+        repaired = repair_json(content)
+    except RepairError:
+        return None
+
+    try:
+        output = output_model.model_validate(repaired.data)
+        return output, repaired.truncated
+    except ValidationError:
+        pass
+
+    # A complete response with some invalid items is not truncated; real cuts are
+    # detected by the repair itself or by finish_reason == "length"
+    feedbacks = salvage_items(repaired.data, "Feedbacks", item_model)
+    if feedbacks is None:
+        return None
+    return output_model(type=validation_type, Feedbacks=feedbacks), repaired.truncated
+
+
+def build_validation_request(text: str, validation_type: str, layout: str = DEFAULT_LAYOUT) -> dict:
+    """
+    Build the chat completion request body for one validation.
+
+    Returns:
+        dict: Keyword arguments for chat.completions.create (also used as the batch request body)
+    """
+    return {
+        "model": "deepseek/deepseek-chat-v3.1",
+        "messages": validation_messages(text, validation_type, layout),
+        "response_format": response_format(ValidationOutput),
+    }
+
+
+def build_indexed_validation_request(index: SentenceIndex, validation_type: str, layout: str = DEFAULT_LAYOUT,
+                                     first_id: int = 1) -> dict:
+    """
+    Build the request body for one index-based validation.
+
+    Args:
+        index (SentenceIndex): Numbered sentences of the section
+        validation_type (str): The validation type
+        layout (str): Message layout (see request_templates)
+        first_id (int): First sentence sent; earlier ones were already answered
+
+    Returns:
+        dict: Keyword arguments for chat.completions.create
+    """
+    return {
+        "model": "deepseek/deepseek-chat-v3.1",
+        "messages": indexed_validation_messages(index.numbered_text(first_id), validation_type, layout),
+        "response_format": response_format(IndexedValidationOutput),
+    }
+
+
+async def _send(request: dict, label: str, deadline: Optional[Deadline] = None):
+    async def call():
+        start = time.perf_counter()
+        response = await request_client(get_openai_client(), deadline).chat.completions.create(
+            **request, **request_options(deadline)
+        )
+        record_usage(label, response.usage, time.perf_counter() - start)
+        return response
+
+    response = await schedule(call)
+    choice = response.choices[0]
+    return choice.message.content or "", choice.finish_reason
+
+
+async def _request_validation(text: str, validation_type: str, deadline: Optional[Deadline] = None,
+                              layout: str = DEFAULT_LAYOUT):
+    return await _send(build_validation_request(text, validation_type, layout), f"validation/{layout}", deadline)
+
+
+def _partial_output(output: ValidationOutput) -> ValidationOutput:
+    print(f"⏱️  {output.type} validation hit the job deadline, keeping {len(output.Feedbacks)} feedbacks as partial")
+    output._partial = True
+    return output
+
+
+def _error_output(validation_type: str, last_error) -> ValidationOutput:
+    return ValidationOutput(
+        type=validation_type,
+        Feedbacks=[
+            Feedback(
+                sentence=ERROR_FEEDBACK_SENTENCE,
+                feedback=f"API 오류 또는 JSON 파싱 실패: {str(last_error)[:200]}"
+            )
+        ]
+    )
+
+
+async def validate_text(text: str, validation_type: str, max_retries: int = 3, max_continuations: int = 2,
+                        deadline: Optional[Deadline] = None, layout: str = DEFAULT_LAYOUT,
+                        mode: str = DEFAULT_VALIDATION_MODE):
     """
     Run validation analysis on given text with specified validation type.
+
+    Malformed JSON is repaired locally before falling back to a retry. When the
+    response is truncated, every fully formed Feedback is kept and only the text
+    after the last returned sentence is sent again.
+
+    In "indexed" mode the text is sent as numbered sentences and the model returns
+    sentence ids; the Feedback sentences are then taken from the original text.
     
     Args:
         text (str): The text content to validate
         validation_type (str): One of 'blue_highlight', 'red_line', 'blue_line', 'black_line', 'red_check'
         max_retries (int): Maximum number of retry attempts
+        max_continuations (int): Maximum number of remainder requests after a truncated response
+        deadline (Deadline, optional): Job deadline; every request is bounded by the time left
+        layout (str): Message layout, 'system_first' or 'shared_prefix' (see request_templates)
+        mode (str): 'verbatim' or 'indexed' (see VALIDATION_MODES)
     
     Returns:
-        ValidationOutput: The validation result
+        ValidationOutput: The validation result; output.partial is True when the deadline
+        passed during a continuation and only the Feedbacks collected so far are returned
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before any Feedback is available
+        QueueFullError: If the scheduler rejects the request because its queue is full
+    """
+    if mode == "indexed":
+        return await _validate_indexed(text, validation_type, max_retries, max_continuations, deadline, layout)
+    if mode != "verbatim":
+        raise ValueError(f"Unknown validation mode: {mode}")
+
+    feedbacks: List[Feedback] = []
+    continuations = 0
+    last_error = None
+    attempt = 0
+
+    while attempt < max_retries:
+        try:
+            content, finish_reason = await _request_validation(text, validation_type, deadline, layout)
+            try:
+                output = ValidationOutput.model_validate_json(content)
+                truncated = False
+            except ValidationError:
+                record_bad_response(content, validation_type, finish_reason)
+                salvaged = salvage_validation_output(content, validation_type)
+                if salvaged is None:
+                    raise
+                output, truncated = salvaged
+                print(f"🔧 Repaired {validation_type} response locally ({len(output.Feedbacks)} feedbacks kept)")
+
+            feedbacks.extend(output.Feedbacks)
+            truncated = truncated or finish_reason == "length"
+            if not truncated:
+                return ValidationOutput(type=validation_type, Feedbacks=feedbacks)
+
+            remainder = remaining_text(text, [fb.sentence for fb in output.Feedbacks])
+            if remainder is None:
+                # Nothing locatable was salvaged, so the whole text has to be sent again
+                raise ValueError(f"truncated response (finish_reason={finish_reason})")
+            if not remainder.strip() or continuations >= max_continuations:
+                return ValidationOutput(type=validation_type, Feedbacks=feedbacks)
+
+            continuations += 1
+            text = remainder
+            print(f"✂️  {validation_type} response truncated, re-requesting remaining {len(text)} characters")
+        except DeadlineExceeded:
+            if feedbacks:
+                return _partial_output(ValidationOutput(type=validation_type, Feedbacks=feedbacks))
+            raise
+        except QueueFullError:
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired:
+                if feedbacks:
+                    return _partial_output(ValidationOutput(type=validation_type, Feedbacks=feedbacks))
+                raise DeadlineExceeded(f"{validation_type} validation ran past the job deadline") from e
+            last_error = e
+            attempt += 1
+            print(f"⚠️  Attempt {attempt} failed for {validation_type}: {str(e)[:100]}...")
+            if attempt < max_retries:
+                await asyncio.sleep(1 if deadline is None else min(1, deadline.remaining()))  # Wait before retry
+
+    if feedbacks:
+        # Keep what was already salvaged instead of discarding it
+        return ValidationOutput(type=validation_type, Feedbacks=feedbacks)
+
+    # Return error result on final failure
+    return _error_output(validation_type, last_error)
+
+
+async def _validate_indexed(text: str, validation_type: str, max_retries: int, max_continuations: int,
+                            deadline: Optional[Deadline], layout: str) -> ValidationOutput:
     """
-    for attempt in range(max_retries):
+    Index-based variant of validate_text.
+
+    Ids outside the numbered range and repeated ids are dropped. A truncated
+    response is continued from the sentence after the highest id returned,
+    keeping the original numbering.
+    """
+    index = SentenceIndex(text)
+    if not len(index):
+        return ValidationOutput(type=validation_type, Feedbacks=[])
+
+    selected: Dict[int, str] = {}
+
+    def rebuild():
+        ids = sorted(selected)
+        output = ValidationOutput(
+            type=validation_type,
+            Feedbacks=[Feedback(sentence=index.sentence(i), feedback=selected[i]) for i in ids],
+        )
+        # Offsets are known, so provenance does not have to search for the sentences
+        output._spans = [index.span(i) for i in ids]
+        return output
+
+    first_id = 1
+    continuations = 0
+    last_error = None
+    attempt = 0
+
+    while attempt < max_retries:
         try:
-            response = await client.chat.completions.parse(
-                model="deepseek/deepseek-chat-v3.1",
-                messages=[
-                    {"role": "system", "content": get_validation_prompt(validation_type)},
-                    {"role": "user", "content": text}  # Limit text length to prevent truncation
-                ],
-                response_format=ValidationOutput,
+            content, finish_reason = await _send(
+                build_indexed_validation_request(index, validation_type, layout, first_id),
+                f"validation/{layout}/indexed",
+                deadline,
             )
-            return response.choices[0].message.parsed
+            try:
+                output = IndexedValidationOutput.model_validate_json(content)
+                truncated = False
+            except ValidationError:
+                record_bad_response(content, validation_type, finish_reason)
+                salvaged = salvage_validation_output(content, validation_type,
+                                                     IndexedValidationOutput, IndexedFeedback)
+                if salvaged is None:
+                    raise
+                output, truncated = salvaged
+                print(f"🔧 Repaired {validation_type} response locally ({len(output.Feedbacks)} feedbacks kept)")
+
+            for fb in output.Feedbacks:
+                if fb.id >= first_id and fb.id in index:
+                    selected.setdefault(fb.id, fb.feedback)
+
+            truncated = truncated or finish_reason == "length"
+            if not truncated:
+                return rebuild()
+
+            last_id = max((fb.id for fb in output.Feedbacks), default=None)
+            if last_id is None:
+                # Nothing was returned before the cut, so the same sentences have to be sent again
+                raise ValueError(f"truncated response (finish_reason={finish_reason})")
+            if last_id >= len(index) or continuations >= max_continuations:
+                return rebuild()
+
+            continuations += 1
+            first_id = last_id + 1
+            print(f"✂️  {validation_type} response truncated, re-requesting sentences {first_id}-{len(index)}")
+        except DeadlineExceeded:
+            if selected:
+                return _partial_output(rebuild())
+            raise
+        except QueueFullError:
+            raise
         except Exception as e:
-            print(f"⚠️  Attempt {attempt + 1} failed for {validation_type}: {str(e)[:100]}...")
-            if attempt == max_retries - 1:
-                # Return empty result on final failure
-                return ValidationOutput(
-                    type=validation_type,
-                    Feedbacks=[
-                        Feedback(
-                            sentence="오류로 인해 분석을 완료할 수 없었습니다.",
-                            feedback=f"API 오류 또는 JSON 파싱 실패: {str(e)[:200]}"
-                        )
-                    ]
-                )
-            await asyncio.sleep(1)  # Wait before retry
+            if deadline is not None and deadline.expired:
+                if selected:
+                    return _partial_output(rebuild())
+                raise DeadlineExceeded(f"{validation_type} validation ran past the job deadline") from e
+            last_error = e
+            attempt += 1
+            print(f"⚠️  Attempt {attempt} failed for {validation_type}: {str(e)[:100]}...")
+            if attempt < max_retries:
+                await asyncio.sleep(1 if deadline is None else min(1, deadline.remaining()))  # Wait before retry
+
+    if selected:
+        return rebuild()
+    return _error_output(validation_type, last_error)
 
 async def run_all_validations():
     """
@@ -73,8 +341,6 @@ async def run_all_validations():
         'detailed_abilities': 'dev/file/park/3_detailed_abilities.txt'
     }
     
-    validation_types = ['blue_highlight', 'red_line', 'blue_line', 'black_line', 'red_check']
-    
     # Load all text files
     text_contents = {}
     for file_key, file_path in file_paths.items():
@@ -86,7 +352,7 @@ async def run_all_validations():
     task_info = []
     
     for file_key, text_content in text_contents.items():
-        for validation_type in validation_types:
+        for validation_type in VALIDATION_TYPES:
             task = validate_text(text_content, validation_type)
             validation_tasks.append(task)
             task_info.append({
@@ -69,6 +69,8 @@ OUTPUT: Return a JSON object matching this exact structure:
 {
   "교과학습발달상황": [
     {
+      "학년": "integer - school year from the [N학년] heading above the table (1, 2 or 3)",
+      "학기": "integer - semester from the 학기 column (1 or 2)",
       "과목": "string - subject name (e.g., 국어, 수학, 영어, 한국사, 통합사회, 통합과학, etc.)",
       "학점수": "integer - credit points for the subject",
       "score_over_average": "string - original score/class average format (e.g., '82/69.2(13.6)')",
@@ -80,17 +82,21 @@ OUTPUT: Return a JSON object matching this exact structure:
 ```
 
 EXTRACTION RULES:
-1. Look for grade tables with columns: 교과, 과목, 학점수, 원점수/과목평균, 성취도, 석차등급
+1. Look for grade tables with columns: 학기, 교과, 과목, 학점수, 원점수/과목평균, 성취도, 석차등급
 2. Extract each subject as a separate entry
-3. For 학점수: Convert to integer
-4. For score_over_average: Keep exact format with scores, averages, and standard deviations
-5. Skip header rows, semester labels, and summary rows
-6. If data is missing, use empty string for strings, 0 for integers
-7. Handle both semester 1 and semester 2 data
+3. For 학년: Use the [N학년] heading of the table the row belongs to
+4. For 학기: The 학기 number is printed once per semester block, often next to a row in the
+   middle of the block; give every row of that block the same 학기
+5. For 학점수: Convert to integer
+6. For score_over_average: Keep exact format with scores, averages, and standard deviations
+7. Skip header rows, semester labels, and summary rows (they are not entries themselves)
+8. If data is missing, use empty string for strings, 0 for integers
+9. Handle both semester 1 and semester 2 data of every 학년
 
 EXAMPLE:
 If you see:
 ```
+[1학년]
 학기 교과 과목 학점수 원점수/과목평균(표준편차) 성취도 석차등급
 1 국어 국어 4 82/69.2(13.6) A(326) 3
 1 수학 수학 4 74/60.7(20.1) B(326) 4
@@ -101,6 +107,8 @@ Extract as:
 {
   "교과학습발달상황": [
     {
+      "학년": 1,
+      "학기": 1,
       "과목": "국어",
       "학점수": 4,
       "score_over_average": "82/69.2(13.6)",
@@ -108,6 +116,8 @@ Extract as:
       "석차등급": "3"
     },
     {
+      "학년": 1,
+      "학기": 1,
       "과목": "수학", 
       "학점수": 4,
       "score_over_average": "74/60.7(20.1)",
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+CPU and memory profiling of the local pipeline stages
+
+Disabled unless a profile directory is configured (MEDSKY_PROFILE_DIR, or
+--profile-dir on worker.py / batch_mode.py). When enabled, every stage wrapped
+in profile_stage() runs under cProfile and tracemalloc and writes
+
+    <profile_dir>/<student>/<stage>.prof         cProfile stats (snakeviz, pstats)
+    <profile_dir>/<student>/<stage>.tracemalloc  allocation snapshot (tracemalloc.Snapshot.load)
+    <profile_dir>/<student>/summary.txt          per-stage time/peak memory and the top-N hot functions
+    <profile_dir>/students.jsonl                 one line per student, for cohort-level comparison
+
+The current student is kept per asyncio task (a context variable), so a job
+only ever records stages under its own student. cProfile and tracemalloc are
+process-wide, though: one stage is profiled at a time, a stage started while
+another one is being profiled runs unprofiled, and CPU time and allocations of
+other tasks running meanwhile are counted in the active stage. Work that runs
+next to other jobs (the worker's background backfills) is therefore wrapped in
+unprofiled() instead of getting a profile of its own.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+PROFILE_DIR = os.getenv("MEDSKY_PROFILE_DIR")
+PROFILE_TOP_N = int(os.getenv("MEDSKY_PROFILE_TOP_N", "20"))
+TRACE_FRAMES = int(os.getenv("MEDSKY_PROFILE_TRACE_FRAMES", "5"))
+
+_student: ContextVar[Optional[dict]] = ContextVar("profiling_student", default=None)
+_unprofiled: ContextVar[bool] = ContextVar("profiling_unprofiled", default=False)
+# Process-wide, like the profilers themselves
+_active_stage: Optional[str] = None
+
+
+def configure_profiling(profile_dir: Optional[str], top_n: int = PROFILE_TOP_N):
+    """Enable profiling into profile_dir, or disable it with None."""
+    global PROFILE_DIR, PROFILE_TOP_N
+    PROFILE_DIR = profile_dir
+    PROFILE_TOP_N = top_n
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_DIR)
+
+
+def _safe_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in str(name))
+
+
+@contextmanager
+def profile_student(student_id: str):
+    """
+    Group the stages run inside the block under one student and write its
+    summary when the block exits.
+    """
+    if not profiling_enabled() or _unprofiled.get() or _student.get() is not None:
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    tracemalloc.reset_peak()
+    student_dir = os.path.join(PROFILE_DIR, _safe_name(student_id))
+    os.makedirs(student_dir, exist_ok=True)
+    student = {"student_id": student_id, "dir": student_dir, "stages": [], "stats": None, "peak": 0}
+    token = _student.set(student)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _student.reset(token)
+        student["elapsed"] = time.perf_counter() - start
+        student["peak"] = max(student["peak"], tracemalloc.get_traced_memory()[1])
+        _write_summary(student)
+
+
+@contextmanager
+def unprofiled():
+    """Run the block, and any task it creates, without profiling its stages."""
+    token = _unprofiled.set(True)
+    try:
+        yield
+    finally:
+        _unprofiled.reset(token)
+
+
+@contextmanager
+def profile_stage(stage: str):
+    """Profile one stage of the current student (or of an implicit 'run' student)."""
+    global _active_stage
+    if not profiling_enabled() or _unprofiled.get() or _active_stage is not None:
+        yield
+        return
+    student = _student.get()
+    if student is None:
+        with profile_student("run"):
+            with profile_stage(stage):
+                yield
+        return
+
+    repeats = sum(1 for entry in student["stages"] if entry["stage"] == stage)
+    file_stem = os.path.join(student["dir"], _safe_name(stage if not repeats else f"{stage}-{repeats + 1}"))
+
+    _active_stage = stage
+    current_before = tracemalloc.get_traced_memory()[0]
+    student["peak"] = max(student["peak"], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )).dump(f"{file_stem}.tracemalloc")
+        profiler.dump_stats(f"{file_stem}.prof")
+        _active_stage = None
+
+        student["peak"] = max(student["peak"], peak)
+        student["stages"].append({
+            "stage": stage,
+            "elapsed": elapsed,
+            "peak_bytes": peak,
+            "retained_bytes": current - current_before,
+            "profile": f"{file_stem}.prof",
+        })
+        if student["stats"] is None:
+            student["stats"] = pstats.Stats(profiler)
+        else:
+            student["stats"].add(profiler)
+
+
+def hot_functions(stats: pstats.Stats, top_n: Optional[int] = None) -> List[Dict]:
+    """The top_n (default PROFILE_TOP_N) functions by own time (tottime) in the given stats."""
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+            "ncalls": ncalls,
+            "tottime": tottime,
+            "cumtime": cumtime,
+        })
+    rows.sort(key=lambda row: row["tottime"], reverse=True)
+    return rows[:top_n or PROFILE_TOP_N]
+
+
+def _write_summary(student: dict):
+    out = io.StringIO()
+    out.write(f"📊 Profile of {student['student_id']}: {student['elapsed']:.2f}s, "
+              f"peak traced memory {student['peak'] / 2**20:.1f} MiB\n")
+    out.write(f"{'stage':<24}{'seconds':>10}{'peak MiB':>10}{'retained MiB':>14}\n")
+    for entry in student["stages"]:
+        out.write(f"{entry['stage']:<24}{entry['elapsed']:>10.3f}{entry['peak_bytes'] / 2**20:>10.1f}"
+                  f"{entry['retained_bytes'] / 2**20:>14.2f}\n")
+
+    hot = hot_functions(student["stats"]) if student["stats"] is not None else []
+    if hot:
+        out.write(f"\nTop {len(hot)} functions by own time\n")
+        out.write(f"{'tottime':>9}{'cumtime':>9}{'ncalls':>9}  function\n")
+        for row in hot:
+            out.write(f"{row['tottime']:>9.3f}{row['cumtime']:>9.3f}{row['ncalls']:>9}  {row['function']}\n")
+
+    summary = out.getvalue()
+    # stderr, so the worker's JSONL results on stdout stay parseable
+    print(summary, file=sys.stderr)
+    with open(os.path.join(student["dir"], "summary.txt"), "w", encoding="utf-8") as f:
+        f.write(summary)
+    with open(os.path.join(PROFILE_DIR, "students.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "student_id": student["student_id"],
+            "elapsed": round(student["elapsed"], 4),
+            "peak_bytes": student["peak"],
+            "stages": [{key: entry[key] for key in ("stage", "elapsed", "peak_bytes", "retained_bytes")}
+                       for entry in student["stages"]],
+            "hot_functions": hot[:5],
+        }, ensure_ascii=False) + "\n")
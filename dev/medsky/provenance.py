@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Provenance from Feedback sentences back to PDF page and line
+
+The parse stage records where every page and line starts in the concatenated
+parsed_text (PageMap). Section offsets from exp2 and sentence offsets (known
+from indexed validation, or located here) turn any Feedback into an absolute offset, and PageMap.locate resolves it
+to page/line with a binary search.
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class PageMap:
+    page_starts: List[int]
+    page_numbers: List[int]
+    line_starts: List[int]
+    page_first_line: List[int]
+
+    @classmethod
+    def from_pages(cls, page_texts: List[str], page_numbers: Optional[List[int]] = None):
+        """
+        Build the map for parsed_text = "".join(page_texts).
+
+        Args:
+            page_texts (List[str]): Text of every parsed page, in order
+            page_numbers (List[int], optional): Page numbers reported by the parser, 1-based by default
+
+        Returns:
+            PageMap: Offsets of every page and line in the concatenated text
+        """
+        page_starts, line_starts, page_first_line = [], [], []
+        offset = 0
+        for text in page_texts:
+            page_starts.append(offset)
+            page_first_line.append(len(line_starts))
+            line_starts.append(offset)
+            line_starts.extend(offset + m.end() for m in re.finditer(r'\n', text) if m.end() < len(text))
+            offset += len(text)
+        return cls(
+            page_starts=page_starts,
+            page_numbers=list(page_numbers) if page_numbers else list(range(1, len(page_texts) + 1)),
+            line_starts=line_starts,
+            page_first_line=page_first_line,
+        )
+
+    def locate(self, offset: int) -> Tuple[int, int, int]:
+        """
+        Resolve a character offset in parsed_text.
+
+        Returns:
+            tuple: (page number, 1-based line within the page, 0-based column)
+        """
+        page_index = max(0, bisect.bisect_right(self.page_starts, offset) - 1)
+        line_index = max(0, bisect.bisect_right(self.line_starts, offset) - 1)
+        line_in_page = line_index - self.page_first_line[page_index] + 1
+        return self.page_numbers[page_index], line_in_page, offset - self.line_starts[line_index]
+
+    def to_dict(self) -> dict:
+        return {
+            "page_starts": self.page_starts,
+            "page_numbers": self.page_numbers,
+            "line_starts": self.line_starts,
+            "page_first_line": self.page_first_line,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**data)
+
+
+class TextLocator:
+    """
+    Find sentences in a text while ignoring whitespace differences.
+
+    PDF parsing breaks lines in the middle of sentences, so the sentences the
+    model returns rarely match the section text byte for byte.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._positions = [i for i, ch in enumerate(text) if not ch.isspace()]
+        self._compact = "".join(text[i] for i in self._positions)
+
+    def find(self, sentence: str, start: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Locate a sentence at or after a character offset.
+
+        Returns:
+            tuple | None: (start, end) offsets in the original text, or None if not found
+        """
+        needle = _WHITESPACE.sub("", sentence)
+        if not needle:
+            return None
+        compact_start = bisect.bisect_left(self._positions, start)
+        idx = self._compact.find(needle, compact_start)
+        if idx < 0:
+            return None
+        return self._positions[idx], self._positions[idx + len(needle) - 1] + 1
+
+    def find_all(self, sentences: List[str]) -> List[Optional[Tuple[int, int]]]:
+        """Locate sentences in order, preferring matches after the previous one."""
+        spans = []
+        cursor = 0
+        for sentence in sentences:
+            span = self.find(sentence, cursor) or self.find(sentence)
+            if span:
+                cursor = span[1]
+            spans.append(span)
+        return spans
+
+
+def feedback_provenance(sentences: List[str], section_text: str, section_start: int,
+                        page_map: Optional[PageMap] = None,
+                        spans: Optional[List[Tuple[int, int]]] = None) -> List[Optional[dict]]:
+    """
+    Precompute absolute offsets (and page/line when a PageMap is available) for
+    each Feedback sentence of one validation result.
+
+    Args:
+        sentences (List[str]): Feedback sentences, in result order
+        section_text (str): Text of the section that was validated
+        section_start (int): Offset of the section in parsed_text
+        page_map (PageMap, optional): Page/line offsets of parsed_text
+        spans (List[Tuple[int, int]], optional): Offsets of the sentences in section_text
+            when already known (indexed validation); located with TextLocator otherwise
+
+    Returns:
+        List[dict | None]: One entry per sentence, None when it could not be located
+    """
+    if spans is None:
+        spans = TextLocator(section_text).find_all(sentences)
+    entries = []
+    for span in spans:
+        if span is None:
+            entries.append(None)
+            continue
+        start, end = section_start + span[0], section_start + span[1]
+        entry = {"start": start, "end": end}
+        if page_map is not None:
+            entry["page"], entry["line"], entry["column"] = page_map.locate(start)
+        entries.append(entry)
+    return entries
+
+
+def build_provenance(page_map: Optional[PageMap], section_starts: Dict[str, int],
+                     sections: Dict[str, str], validations: Dict[Tuple[str, str], object]) -> dict:
+    """
+    Assemble the provenance document stored next to the validation results.
+
+    Returns:
+        dict: The page map, section offsets and per-result Feedback positions
+    """
+    feedbacks = {}
+    for (section, validation_type), result in validations.items():
+        feedbacks[f"{section}_{validation_type}"] = feedback_provenance(
+            [fb.sentence for fb in result.Feedbacks],
+            sections[section],
+            section_starts.get(section, 0),
+            page_map,
+            result.spans,
+        )
+    return {
+        "pages": page_map.to_dict() if page_map is not None else None,
+        "sections": section_starts,
+        "feedbacks": feedbacks,
+    }
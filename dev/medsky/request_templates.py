@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Message templates and response schemas built once per process
+
+Two validation layouts are available:
+- "system_first": rubric as the system message, section text as the user message (original layout)
+- "shared_prefix": a type-independent system message, then the section text, then the rubric,
+  so the five validations of one section share a long identical prefix that provider-side
+  prompt caching can reuse
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+from extraction_prompts import get_extraction_prompt
+from validation_prompts import SHARED_VALIDATION_SYSTEM_PROMPT, get_indexed_output_prompt, get_validation_prompt
+
+PROMPT_LAYOUTS = ("system_first", "shared_prefix")
+DEFAULT_LAYOUT = os.getenv("MEDSKY_PROMPT_LAYOUT", "system_first")
+
+
+@lru_cache(maxsize=None)
+def response_format(model) -> dict:
+    """
+    Strict JSON-schema response_format for a pydantic response model, generated once per model.
+
+    Same shape beta.chat.completions.parse sends ("strict": true, additionalProperties
+    false and every field required), built here so create() calls and batch request
+    lines do not depend on SDK internals.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": _strict_schema(model.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def _strict_schema(schema: dict) -> dict:
+    """Close every object of a JSON schema: no additional properties, every property required."""
+    strict = dict(schema)
+    for key in ("$defs", "properties"):
+        if key in strict:
+            strict[key] = {name: _strict_schema(sub) for name, sub in strict[key].items()}
+    for key in ("anyOf", "allOf"):
+        if key in strict:
+            strict[key] = [_strict_schema(sub) for sub in strict[key]]
+    if isinstance(strict.get("items"), dict):
+        strict["items"] = _strict_schema(strict["items"])
+    if strict.get("type") == "object":
+        strict["additionalProperties"] = False
+        strict["required"] = list(strict.get("properties", {}))
+    return strict
+
+
+@lru_cache(maxsize=None)
+def _message(role: str, content: str) -> Dict[str, str]:
+    return {"role": role, "content": content}
+
+
+def extraction_messages(text: str, section_type: str) -> List[Dict[str, str]]:
+    """Messages for an exp4 extraction call; the system message is built once per section type."""
+    return [
+        _message("system", get_extraction_prompt(section_type)),
+        {"role": "user", "content": text},
+    ]
+
+
+def validation_messages(text: str, validation_type: str, layout: str = DEFAULT_LAYOUT) -> List[Dict[str, str]]:
+    """
+    Messages for an exp5 validation call.
+
+    Args:
+        text (str): Section text to validate
+        validation_type (str): One of 'blue_highlight', 'red_line', 'blue_line', 'black_line', 'red_check'
+        layout (str): One of PROMPT_LAYOUTS
+
+    Returns:
+        list: Chat messages; the fixed messages are shared objects built once per process
+    """
+    if layout == "shared_prefix":
+        return [
+            _message("system", SHARED_VALIDATION_SYSTEM_PROMPT),
+            {"role": "user", "content": text},
+            _message("user", get_validation_prompt(validation_type)),
+        ]
+    if layout != "system_first":
+        raise ValueError(f"Unknown prompt layout: {layout}")
+    return [
+        _message("system", get_validation_prompt(validation_type)),
+        {"role": "user", "content": text},
+    ]
+
+
+def indexed_validation_messages(numbered_text: str, validation_type: str,
+                                layout: str = DEFAULT_LAYOUT) -> List[Dict[str, str]]:
+    """
+    Messages for an index-based validation call: the layout's messages for the
+    numbered sentences, followed by the sentence-number output instructions.
+    """
+    return [
+        *validation_messages(numbered_text, validation_type, layout),
+        _message("user", get_indexed_output_prompt(validation_type)),
+    ]
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Priority-aware scheduler in front of the LLM calls
+
+Interactive uploads and batch backfills share one provider quota. Every LLM
+request goes through schedule(); with a scheduler configured, requests wait in
+per-class queues and are dispatched either by strict priority or weighted-fair
+(stride) order. Within a class, tenants (e.g. schools) are served round-robin so
+one tenant's backlog cannot starve another's.
+
+The entry points (whole_flow, worker, batch_mode) install the scheduler with
+configure_scheduler(scheduler_from_options(...)); the defaults come from
+MEDSKY_LLM_CONCURRENCY, MEDSKY_SCHEDULER_WEIGHTS ("interactive=8,batch=1"),
+MEDSKY_MAX_QUEUE_DEPTH ("interactive=200,batch=5000") and MEDSKY_STRICT_PRIORITY.
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when a job class queue is too deep to admit another request."""
+
+
+# Classes in strict-priority order, with their default weighted-fair shares
+DEFAULT_WEIGHTS = {"interactive": 8, "batch": 1}
+# Every class the pipeline submits to (uploads, and backfills / batch runs)
+JOB_CLASSES = tuple(DEFAULT_WEIGHTS)
+DEFAULT_MAX_QUEUE_DEPTH = {"interactive": 200, "batch": 5000}
+
+_job_class = contextvars.ContextVar("medsky_job_class", default="interactive")
+_tenant = contextvars.ContextVar("medsky_tenant", default="default")
+
+
+@contextmanager
+def job_context(job_class: str = "interactive", tenant: str = "default"):
+    """
+    Tag every LLM call made inside the block (including tasks it spawns) with a
+    job class and tenant.
+    """
+    class_token = _job_class.set(job_class)
+    tenant_token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _job_class.reset(class_token)
+        _tenant.reset(tenant_token)
+
+
+class _ClassQueue:
+    def __init__(self, weight: float, max_depth: int):
+        self.weight = weight
+        self.max_depth = max_depth
+        self.tenants: "OrderedDict[str, deque]" = OrderedDict()
+        self.depth = 0
+        self.pass_value = 0.0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=2000)
+
+    def push(self, tenant: str, waiter):
+        self.tenants.setdefault(tenant, deque()).append(waiter)
+        self.depth += 1
+
+    def remove(self, tenant: str, waiter):
+        """Drop a waiter that gave up before it was dispatched."""
+        waiters = self.tenants.get(tenant)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            return
+        self.depth -= 1
+        if not waiters:
+            del self.tenants[tenant]
+
+    def pop(self):
+        """Pop the next waiter, rotating between tenants."""
+        while self.tenants:
+            tenant, waiters = next(iter(self.tenants.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self.tenants.move_to_end(tenant)
+            else:
+                del self.tenants[tenant]
+            self.depth -= 1
+            if not waiter[0].cancelled():
+                return waiter
+        return None
+
+
+class LLMScheduler:
+    """
+    Dispatch LLM requests from per-class queues onto a fixed number of slots.
+
+    Args:
+        max_concurrency (int): Requests allowed in flight at once (the provider quota)
+        weights (dict): Weighted-fair share per job class
+        max_queue_depth (dict): Admission limit per job class
+        strict_priority (bool): Always serve the first class in weights order first
+    """
+
+    def __init__(self, max_concurrency: int = 8, weights: Optional[Dict[str, float]] = None,
+                 max_queue_depth: Optional[Dict[str, int]] = None, strict_priority: bool = False):
+        weights = weights or DEFAULT_WEIGHTS
+        max_queue_depth = {**DEFAULT_MAX_QUEUE_DEPTH, **(max_queue_depth or {})}
+        self.max_concurrency = max_concurrency
+        self.strict_priority = strict_priority
+        self.classes = {
+            name: _ClassQueue(weight, max_queue_depth.get(name, 1000))
+            for name, weight in weights.items()
+        }
+        self.in_flight = 0
+
+    def _next_class(self) -> Optional[_ClassQueue]:
+        ready = [queue for queue in self.classes.values() if queue.depth]
+        if not ready:
+            return None
+        if self.strict_priority:
+            return ready[0]
+        return min(ready, key=lambda queue: queue.pass_value)
+
+    def _dispatch(self):
+        while self.in_flight < self.max_concurrency:
+            queue = self._next_class()
+            if queue is None:
+                return
+            waiter = queue.pop()
+            if waiter is None:
+                continue
+            future, enqueued_at = waiter
+            queue.pass_value += 1.0 / queue.weight
+            queue.waits.append(time.monotonic() - enqueued_at)
+            queue.running += 1
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _release(self, queue: _ClassQueue):
+        queue.running -= 1
+        queue.completed += 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    async def submit(self, call: Callable[[], Awaitable], job_class: str = "interactive", tenant: str = "default"):
+        """
+        Queue a request and run it once a slot is granted.
+
+        Args:
+            call: Zero-argument callable returning the awaitable to run
+            job_class (str): One of the configured job classes
+            tenant (str): Tenant / school the request belongs to
+
+        Returns:
+            The awaited result of call()
+
+        Raises:
+            QueueFullError: If the job class queue is already at its admission limit
+            ValueError: If job_class is not one of the configured classes
+        """
+        queue = self.classes.get(job_class)
+        if queue is None:
+            raise ValueError(f"unknown job class {job_class!r}, the scheduler has {', '.join(self.classes)}")
+        if queue.depth >= queue.max_depth:
+            queue.rejected += 1
+            raise QueueFullError(f"{job_class} queue is full ({queue.depth} waiting)")
+
+        if not queue.depth and not queue.running:
+            # An idle class rejoins at the current virtual time instead of bursting
+            active = [q.pass_value for q in self.classes.values() if q.depth or q.running]
+            if active:
+                queue.pass_value = max(queue.pass_value, min(active))
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, time.monotonic())
+        queue.push(tenant, waiter)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled right after the slot was granted
+                self._release(queue)
+            else:
+                # Cancelled while queued (e.g. by a job deadline): free its place in the queue
+                queue.remove(tenant, waiter)
+            raise
+
+        try:
+            return await call()
+        finally:
+            self._release(queue)
+
+    def stats(self) -> Dict[str, dict]:
+        """Queue depth, throughput and queue-wait percentiles (seconds) per job class."""
+        stats = {}
+        for name, queue in self.classes.items():
+            waits = sorted(queue.waits)
+            stats[name] = {
+                "queued": queue.depth,
+                "running": queue.running,
+                "completed": queue.completed,
+                "rejected": queue.rejected,
+                "wait_p50": _percentile(waits, 0.50),
+                "wait_p95": _percentile(waits, 0.95),
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+        return stats
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _parse_shares(value: str) -> Dict[str, float]:
+    """Parse "interactive=8,batch=1" into {"interactive": 8.0, "batch": 1.0}."""
+    shares = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, number = item.partition("=")
+            shares[name.strip()] = float(number)
+    return shares
+
+
+def scheduler_from_options(max_concurrency: Optional[int] = None, weights: Optional[str] = None,
+                           max_queue_depth: Optional[str] = None,
+                           strict_priority: Optional[bool] = None) -> LLMScheduler:
+    """
+    Build a scheduler from CLI-style options, falling back to the MEDSKY_* environment variables.
+
+    Args:
+        max_concurrency (int, optional): Requests in flight at once
+        weights (str, optional): Weighted-fair shares, e.g. "interactive=8,batch=1"
+        max_queue_depth (str, optional): Admission limits, e.g. "interactive=200,batch=5000"
+        strict_priority (bool, optional): Serve classes in weights order instead of weighted-fair
+
+    Returns:
+        LLMScheduler: A new scheduler (install it with configure_scheduler)
+
+    Raises:
+        ValueError: If the weights do not cover every class in JOB_CLASSES with a positive
+        share, or a queue depth names a class that does not exist
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("MEDSKY_LLM_CONCURRENCY", "8"))
+    weights = weights or os.getenv("MEDSKY_SCHEDULER_WEIGHTS")
+    max_queue_depth = max_queue_depth or os.getenv("MEDSKY_MAX_QUEUE_DEPTH")
+    if strict_priority is None:
+        strict_priority = os.getenv("MEDSKY_STRICT_PRIORITY", "") in ("1", "true", "yes")
+
+    weights = _parse_shares(weights) if weights else dict(DEFAULT_WEIGHTS)
+    missing = [name for name in JOB_CLASSES if weights.get(name, 0) <= 0]
+    if missing:
+        # A class without a queue would fail every request it submits (e.g. all backfills)
+        raise ValueError(f"scheduler weights {weights} need a positive share for {', '.join(missing)}")
+    max_queue_depth = {name: int(depth) for name, depth in _parse_shares(max_queue_depth).items()} \
+        if max_queue_depth else None
+    unknown = [name for name in max_queue_depth or {} if name not in weights]
+    if unknown:
+        raise ValueError(f"max queue depth given for unknown job classes {', '.join(unknown)}")
+    return LLMScheduler(
+        max_concurrency=max_concurrency,
+        weights=weights,
+        max_queue_depth=max_queue_depth,
+        strict_priority=strict_priority,
+    )
+
+
+def add_scheduler_arguments(parser: argparse.ArgumentParser):
+    """Add the scheduler options shared by the worker and batch entry points."""
+    parser.add_argument("--llm-concurrency", type=int, help="LLM requests in flight at once")
+    parser.add_argument("--scheduler-weights", help='Weighted-fair shares, e.g. "interactive=8,batch=1"')
+    parser.add_argument("--max-queue-depth", help='Admission limits, e.g. "interactive=200,batch=5000"')
+    parser.add_argument("--strict-priority", action="store_true", default=None,
+                        help="Serve interactive requests strictly before batch ones")
+
+
+def scheduler_from_args(args: argparse.Namespace) -> LLMScheduler:
+    return scheduler_from_options(args.llm_concurrency, args.scheduler_weights,
+                                  args.max_queue_depth, args.strict_priority)
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def configure_scheduler(scheduler: Optional[LLMScheduler]):
+    """Install the process-wide scheduler (None sends requests straight through)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> Optional[LLMScheduler]:
+    return _scheduler
+
+
+def scheduler_stats() -> Dict[str, dict]:
+    """stats() of the configured scheduler, or {} when requests are not scheduled."""
+    return _scheduler.stats() if _scheduler is not None else {}
+
+
+async def schedule(call: Callable[[], Awaitable]):
+    """
+    Run an LLM request through the configured scheduler, using the job class and
+    tenant of the current job_context. Without a scheduler the request runs directly.
+    """
+    if _scheduler is None:
+        return await call()
+    return await _scheduler.submit(call, _job_class.get(), _tenant.get())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Response models shared by extraction (exp3/exp4) and validation (exp5)
+
+TypeAdapters are built once per type and cached (the strict response_format of
+each model is cached in request_templates.py); dump_json writes a result
+straight to compact UTF-8 JSON bytes with pydantic-core, without model_dump()
+dicts.
+"""
+from functools import lru_cache
+from typing import List, Literal, Optional, Tuple, get_args
+
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
+
+
+class CreativeActivity(BaseModel):
+    영역: str = Field(description="해당 창의적 체험활동상황의 영역. 영역 column of table e.g - 자율활동, 동아리활동, ...")
+    시간: int = Field(description="해당 창의적 체험활동상황의 시간. 시간 column of table")
+    특기사항: str = Field(description="해당 창의적 체험활동상황의 특기사항. 특기사항 column of table")
+
+class CreativeActivities(BaseModel):
+    창의적체험활동상황: List[CreativeActivity] = Field(description="The list of creative activities")
+
+
+class AcademicDevelopment(BaseModel):
+    학년: int = Field(description="해당 교과학습발달상황의 학년. 표 위의 [1학년], [2학년] 표기의 숫자")
+    학기: int = Field(description="해당 교과학습발달상황의 학기. 학기 column of table (1 또는 2)")
+    과목: str = Field(description="해당 교과학습발달상황의 과목. 과목 column of table e.g - 수학, 과학, ...")
+    학점수: int = Field(description="해당 교과학습발달상황의 학점수. 학점수 column of table")
+    score_over_average: str = Field(description="해당 교과학습발달상황의 원점수/과목평균. 원점수/과목평균 column of table")
+    성취도: str = Field(description="해당 교과학습발달상황의 성취도. 성취도 column of table")
+    석차등급: str = Field(description="해당 교과학습발달상황의 석차등급. 석차등급 column of table")
+
+
+class AcademicDevelopments(BaseModel):
+    교과학습발달상황: List[AcademicDevelopment] = Field(description="The list of academic developments")
+
+
+class DetailedAbility(BaseModel):
+    과목: str = Field(description="해당 세부특기사항의 과목.")
+    특기사항: str = Field(description="해당 과목의 특기사항.")
+
+class DetailedAbilities(BaseModel):
+    세부특기사항: List[DetailedAbility] = Field(description="The list of detailed abilities")
+
+
+EXTRACTION_MODELS = {
+    'creative': CreativeActivities,
+    'academic': AcademicDevelopments,
+    'detailed': DetailedAbilities,
+}
+
+# Pipeline section (exp2 split, output file names) -> extraction section type (EXTRACTION_MODELS key)
+EXTRACTION_SECTIONS = {
+    'creative_activities': 'creative',
+    'academic_development': 'academic',
+    'detailed_abilities': 'detailed',
+}
+
+ValidationType = Literal["blue_highlight", "red_line", "blue_line", "black_line", "red_check"]
+VALIDATION_TYPES = list(get_args(ValidationType))
+
+
+class Feedback(BaseModel):
+    sentence: str = Field(description="평가된 컨텐츠에서 피드백 대상이 되는 문장. 원본 텍스트와 반드시 동일하게 작성해야 함.")
+    feedback: str = Field(description="컨텐츠에 대한 피드백. 해당 피드백을 왜 제시하게 됐는지에 대한 설명")
+
+
+# Sentence of the single placeholder Feedback a validation returns when every
+# attempt failed; saved results containing it are errors, not findings
+ERROR_FEEDBACK_SENTENCE = "오류로 인해 분석을 완료할 수 없었습니다."
+
+
+class ValidationOutput(BaseModel):
+    type: ValidationType
+    Feedbacks: List[Feedback] = Field(description="The list of Feedbacks for the validation")
+
+    # Set when the job deadline cut the validation short after some Feedbacks were
+    # collected; not part of the response schema or the serialized result
+    _partial: bool = PrivateAttr(default=False)
+    # (start, end) of every Feedback sentence in the section text, when the
+    # sentences were taken from the text by offset (indexed validation mode)
+    _spans: Optional[List[Tuple[int, int]]] = PrivateAttr(default=None)
+
+    @property
+    def partial(self) -> bool:
+        return self._partial
+
+    @property
+    def spans(self) -> Optional[List[Tuple[int, int]]]:
+        return self._spans
+
+
+class IndexedFeedback(BaseModel):
+    id: int = Field(description="피드백 대상 문장의 번호. 원문에 [번호]로 표기된 값.")
+    feedback: str = Field(description="해당 문장을 선별한 근거를 1문장으로 간결히 서술")
+
+
+class IndexedValidationOutput(BaseModel):
+    type: ValidationType
+    Feedbacks: List[IndexedFeedback] = Field(description="The list of Feedbacks for the validation")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    """TypeAdapter for a model or a typing construct such as List[Model], built once per type."""
+    return TypeAdapter(tp)
+
+
+def dump_json(result: BaseModel) -> bytes:
+    """Compact UTF-8 JSON of one result (Korean text is not \\u-escaped)."""
+    return type_adapter(type(result)).dump_json(result)
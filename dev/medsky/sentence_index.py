@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Local sentence segmentation for index-based validation
+
+The section text is split into numbered sentences before the request, so the
+model only has to return sentence numbers; the sentences themselves (and their
+offsets) come from the original text instead of the model's copy of it.
+
+Prose wraps across single newlines, so a single newline only ends a segment
+next to a non-prose line: a table row (cells separated by column padding, all
+of them short, as in the academic development grade table) or a short heading
+without sentence punctuation. A row whose last cell is long prose (the
+특기사항 column of creative activities) stays part of its sentence.
+"""
+import re
+from typing import List, Tuple
+
+# A sentence ends at '.', '?' or '!' followed by whitespace (dates such as
+# 2024.04.11. are not sentence ends), and never continues across a blank line
+_BOUNDARY = re.compile(r'(?<![0-9])[.?!](?=\s|$)|\n[ \t]*\n')
+_CELL_GAP = re.compile(r'[ \t]{2,}|\t')
+TABLE_CELL_MAX = 20
+HEADING_MAX = 15
+
+
+def _is_non_prose(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped:
+        return False
+    cells = _CELL_GAP.split(stripped)
+    if len(cells) > 1:
+        return all(len(cell) <= TABLE_CELL_MAX for cell in cells)
+    return len(stripped) <= HEADING_MAX and stripped[-1] not in ".?!"
+
+
+def _line_breaks(text: str) -> List[int]:
+    """Offsets of the single newlines that end a non-prose line or start one."""
+    lines = text.split("\n")
+    non_prose = [_is_non_prose(line) for line in lines]
+    breaks = []
+    offset = 0
+    for i, line in enumerate(lines[:-1]):
+        offset += len(line)
+        if non_prose[i] or non_prose[i + 1]:
+            breaks.append(offset)
+        offset += 1
+    return breaks
+
+
+def segment_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into sentences.
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) offsets of every non-empty sentence, whitespace trimmed
+    """
+    cuts = sorted([
+        *((m.start(), m.end()) if m.group().startswith('\n') else (m.end(), m.end()) for m in _BOUNDARY.finditer(text)),
+        *((offset, offset + 1) for offset in _line_breaks(text)),
+        (len(text), len(text)),
+    ])
+    spans = []
+    start = 0
+    for end, next_start in cuts:
+        if end < start:
+            continue  # Inside a blank-line cut already taken
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((start, end))
+        start = next_start
+    return spans
+
+
+class SentenceIndex:
+    """Numbered sentences of one section text; ids are 1-based."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans = segment_sentences(text)
+        # Exactly as in the text, so Feedback sentences match the source byte for byte
+        self.sentences = [text[start:end] for start, end in self.spans]
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def __contains__(self, sentence_id: int) -> bool:
+        return 1 <= sentence_id <= len(self.sentences)
+
+    def sentence(self, sentence_id: int) -> str:
+        return self.sentences[sentence_id - 1]
+
+    def span(self, sentence_id: int) -> Tuple[int, int]:
+        return self.spans[sentence_id - 1]
+
+    def numbered_text(self, first_id: int = 1) -> str:
+        """The sentences from first_id on, one per line as '[id] sentence' (line wraps and padding collapsed)."""
+        return "\n".join(
+            f"[{sentence_id}] {' '.join(sentence.split())}"
+            for sentence_id, sentence in enumerate(self.sentences[first_id - 1:], first_id)
+        )
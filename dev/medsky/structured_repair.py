@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Local repair of malformed or truncated structured-output JSON returned by the LLM
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from provenance import TextLocator
+
+
+class RepairError(ValueError):
+    """Raised when a response cannot be turned into valid JSON locally."""
+
+
+@dataclass
+class RepairResult:
+    data: Any
+    text: str
+    truncated: bool = False
+    repairs: List[str] = field(default_factory=list)
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_VALUE_STARTS = set('"{[]}-0123456789tfn')
+
+
+def _skip_ws(s: str, j: int) -> int:
+    while j < len(s) and s[j].isspace():
+        j += 1
+    return j
+
+
+def _is_closing_quote(s: str, i: int, in_object: bool) -> bool:
+    """
+    Decide whether the quote at s[i] ends the current string or is an unescaped
+    quote inside it (e.g. 그는 "왜"라고 물었다).
+    """
+    j = _skip_ws(s, i + 1)
+    if j >= len(s) or s[j] in "}]:":
+        return True
+    if s[j] != ",":
+        return False
+
+    k = _skip_ws(s, j + 1)
+    if k >= len(s):
+        return True
+    if s[k] != '"' or not in_object:
+        return s[k] in _VALUE_STARTS
+    # Inside an object the next member must be a key, i.e. a string followed by ':'
+    end = s.find('"', k + 1)
+    if end < 0:
+        return True
+    end = _skip_ws(s, end + 1)
+    return end >= len(s) or s[end] == ":"
+
+
+def _drop_trailing_comma(out: List[str]) -> bool:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j:]
+        return True
+    return False
+
+
+def repair_json(raw: str) -> RepairResult:
+    """
+    Repair common structured-output faults and parse the result.
+
+    Handles markdown fences and surrounding prose, trailing commas, unescaped
+    quotes inside strings, raw control characters in strings and truncated
+    output. Truncated output is cut back to the last complete value so that
+    only fully formed items survive.
+
+    Args:
+        raw (str): The raw message content returned by the model
+
+    Returns:
+        RepairResult: The parsed data, the repaired text and what was fixed
+
+    Raises:
+        RepairError: If no JSON value can be recovered
+    """
+    # Leading prose may contain brackets of its own (e.g. "결과: [참고] {...}"), so
+    # every '{' is tried as the start of the value, then every '['
+    starts = [i for i, ch in enumerate(raw) if ch == "{"] + [i for i, ch in enumerate(raw) if ch == "["]
+    if not starts:
+        raise RepairError("no JSON object in response")
+    error = None
+    for start in starts:
+        try:
+            return _repair_from(raw[start:])
+        except RepairError as e:
+            error = error or e
+    raise error
+
+
+def _repair_from(s: str) -> RepairResult:
+    """Repair and parse the JSON value that starts at s[0]."""
+    out: List[str] = []
+    stack: List[str] = []
+    repairs: List[str] = []
+    in_str = escaped = False
+    complete = False
+    safe_len, safe_stack = 0, []
+
+    for i, ch in enumerate(s):
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                if _is_closing_quote(s, i, bool(stack) and stack[-1] == "}"):
+                    in_str = False
+                else:
+                    out.append("\\")
+                    repairs.append("unescaped_quote")
+            out.append(ch)
+            continue
+
+        if ch == '"':
+            in_str = True
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+            safe_len, safe_stack = len(out), list(stack)
+        elif ch in "}]":
+            if not stack:
+                break
+            if _drop_trailing_comma(out):
+                repairs.append("trailing_comma")
+            out.append(stack.pop())
+            safe_len, safe_stack = len(out), list(stack)
+            if not stack:
+                complete = True
+                break
+        elif ch == ",":
+            safe_len, safe_stack = len(out), list(stack)
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    truncated = not complete
+    if truncated:
+        # Cut back to the last complete value and close whatever is still open
+        out = out[:safe_len]
+        if _drop_trailing_comma(out):
+            repairs.append("trailing_comma")
+        out.extend(reversed(safe_stack))
+        repairs.append("truncated")
+
+    text = "".join(out)
+    try:
+        data = json.loads(text, strict=False)
+    except json.JSONDecodeError as e:
+        raise RepairError(f"unrepairable JSON: {e}") from e
+
+    return RepairResult(data=data, text=text, truncated=truncated, repairs=repairs)
+
+
+def salvage_items(data: Any, list_field: str, item_model) -> Optional[list]:
+    """
+    Keep every fully formed item of a list field, dropping the ones that do not validate.
+
+    Args:
+        data (Any): Parsed (possibly repaired) JSON data
+        list_field (str): Name of the list field, e.g. 'Feedbacks'
+        item_model: Pydantic model each list item must satisfy
+
+    Returns:
+        list | None: The valid items, or None if the field is missing altogether
+    """
+    if not isinstance(data, dict) or not isinstance(data.get(list_field), list):
+        return None
+
+    items = []
+    for raw_item in data[list_field]:
+        try:
+            items.append(item_model.model_validate(raw_item))
+        except Exception:
+            continue
+    return items
+
+
+def remaining_text(text: str, sentences: List[str]) -> Optional[str]:
+    """
+    Return the part of the source text that comes after the last salvaged sentence.
+
+    Args:
+        text (str): The source text that was validated
+        sentences (List[str]): Sentences already returned by the model, in order
+
+    Returns:
+        str | None: The unprocessed remainder, or None if no sentence could be located
+    """
+    spans = [span for span in TextLocator(text).find_all(sentences) if span]
+    if not spans:
+        return None
+    return text[max(end for _, end in spans):]
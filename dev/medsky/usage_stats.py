@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Per-process token usage, prompt-cache hits and latency of LLM calls
+"""
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+_totals: Dict[str, UsageTotals] = {}
+
+
+def cached_prompt_tokens(usage) -> int:
+    """
+    Prompt tokens served from the provider's prefix cache.
+
+    OpenAI-style responses report prompt_tokens_details.cached_tokens; DeepSeek's
+    native API reports prompt_cache_hit_tokens.
+    """
+    if usage is None:
+        return 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    if cached is None and getattr(usage, "model_extra", None):
+        cached = usage.model_extra.get("prompt_cache_hit_tokens")
+    return cached or 0
+
+
+def record_usage(label: str, usage, latency: float):
+    """
+    Add one response's usage to the running totals.
+
+    Args:
+        label (str): Grouping key, e.g. 'validation/shared_prefix'
+        usage: The response's usage object (may be None)
+        latency (float): Seconds the request took
+    """
+    totals = _totals.setdefault(label, UsageTotals())
+    totals.calls += 1
+    totals.latency += latency
+    if usage is not None:
+        totals.prompt_tokens += usage.prompt_tokens or 0
+        totals.completion_tokens += usage.completion_tokens or 0
+        totals.cached_tokens += cached_prompt_tokens(usage)
+
+
+def usage_summary() -> Dict[str, dict]:
+    """Usage totals per label, with cache hit rate and mean latency."""
+    summary = {}
+    for label, totals in _totals.items():
+        row = asdict(totals)
+        row["cache_hit_rate"] = totals.cache_hit_rate
+        row["mean_latency"] = totals.latency / totals.calls if totals.calls else 0.0
+        summary[label] = row
+    return summary
+
+
+def reset_usage():
+    _totals.clear()
+
+
+def print_usage_summary():
+    print(f"{'label':<28}{'calls':>7}{'prompt':>10}{'cached':>10}{'hit %':>8}{'output':>9}{'mean s':>8}")
+    for label, row in usage_summary().items():
+        print(f"{label:<28}{row['calls']:>7}{row['prompt_tokens']:>10}{row['cached_tokens']:>10}"
+              f"{row['cache_hit_rate'] * 100:>7.1f}%{row['completion_tokens']:>9}{row['mean_latency']:>8.2f}")
@@ -2,6 +2,7 @@
 """
 Validation prompts for analyzing student activities based on different evaluation criteria
 """
+from schemas import VALIDATION_TYPES
 
 BLUE_HIGHLIGHT_PROMPT = """
 역할: 학생 활동 기록에서 파란색 하이라이트(진로 역량 강조)에 해당하는 문장만 선별하여 JSON으로 반환하는 분석가.
@@ -158,6 +159,29 @@ RED_CHECK_PROMPT = """
 - sentence는 원문과 완전 일치, feedback은 평가가 불가능한 구체 사유를 1-2문장으로 간결히 서술(한국어).
 """
 
+# Type-independent system prompt for the prefix-cache-friendly layout: the section text
+# follows it and the type-specific rubric above comes last, so the shared prefix is reused
+SHARED_VALIDATION_SYSTEM_PROMPT = """
+역할: 학생 활동 기록(학교생활기록부)의 문장을 평가 기준에 따라 선별하여 JSON으로 반환하는 분석가.
+
+입력 구성:
+1) 먼저 평가 대상인 학생 활동 기록 원문이 주어진다.
+2) 마지막 메시지에 이번에 적용할 평가 기준(포함 체크리스트, 제외 규칙, 판단 절차, 출력 지시)이 주어진다.
+
+원문 전체를 읽은 뒤, 마지막에 주어진 평가 기준만을 적용하여 해당 기준의 출력 지시에 맞는 JSON 1개 객체로만 답할 것.
+"""
+
+# Sent after the rubric in index-based validation: the text arrives as numbered
+# sentences and the model answers with sentence numbers instead of copying them
+INDEXED_OUTPUT_PROMPT = """
+출력 지시 변경(문장 번호 모드, 위 출력 지시보다 우선):
+- 원문은 한 줄에 한 문장씩 "[번호] 문장" 형식으로 주어진다.
+- 문장을 다시 쓰지 말고 해당 문장의 번호만 id(정수)로 반환할 것.
+- 스키마: { "type": "__TYPE__", "Feedbacks": [ { "id": integer, "feedback": string } ] }
+- 일치 문장이 없으면 "Feedbacks": []로 반환.
+- feedback은 판단 근거를 1문장으로 간결히 서술(한국어).
+"""
+
 # Usage function
 def get_validation_prompt(validation_type):
     """
@@ -179,6 +203,11 @@ def get_validation_prompt(validation_type):
     
     return prompts.get(validation_type, "Invalid validation type")
 
+
+def get_indexed_output_prompt(validation_type):
+    """Output instructions for index-based validation of the given type."""
+    return INDEXED_OUTPUT_PROMPT.replace("__TYPE__", validation_type)
+
 if __name__ == "__main__":
     print("Available validation prompts:")
     print("1. blue_highlight - 진로 역량 강조")
@@ -189,7 +218,7 @@ if __name__ == "__main__":
     
     validation_type = input("Enter validation type: ").strip().lower()
     
-    if validation_type in ['blue_highlight', 'red_line', 'blue_line', 'black_line', 'red_check']:
+    if validation_type in VALIDATION_TYPES:
         print("\n" + "="*80 + "\n")
         print(get_validation_prompt(validation_type))
     else:
@@ -1,50 +1,226 @@
-from llama_cloud_services import LlamaParse
-import os 
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-import json 
-
-load_dotenv()
-
-LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
-
-parser = LlamaParse(
-    api_key=LLAMA_API_KEY,
-    parse_mode="parse_page_without_llm",
-    high_res_ocr=True,
-    outlined_table_extraction=True,
-    output_tables_as_HTML=True
-)
-
-file_path = "dev/medsky/file/park/park_sample.pdf"
-
-result = parser.parse(file_path)
-
-parsed_text = ""
-for page in result.pages:
-    parsed_text += page.text
-
-from exp2_parsing_via_regex import parse_detailed_abilities, parse_academic_development, parse_behavioral_characteristics, parse_creative_activities, parse_reading_activities
-
-
-reading_activities = parse_reading_activities(parsed_text)
-academic_development = parse_academic_development(parsed_text)
-detailed_abilities = parse_detailed_abilities(parsed_text)
-behavioral_characteristics = parse_behavioral_characteristics(parsed_text)
-creative_activities = parse_creative_activities(parsed_text)
-
-
+import json
 
+from clients import get_llama_parser
+from deadline import Deadline, DeadlineExceeded
+from exp2_parsing_via_regex import split_sections_with_offsets
 from exp4_extraction import parse_academic_development, parse_creative_activity, parse_detailed_ability
-
-academic_development_extracted = parse_academic_development(academic_development)
-creative_activity_extracted = parse_creative_activity(creative_activities)
-detailed_ability_extracted = parse_detailed_ability(detailed_abilities)
-
 from exp5_validation import validate_text
+from profiling import profile_stage, profile_student
+from provenance import PageMap, build_provenance
+from scheduler import configure_scheduler, job_context, scheduler_from_options, scheduler_stats
+from schemas import VALIDATION_TYPES
 
-for validation_type in ["blue_highlight", "red_line", "blue_line", "black_line", "red_check"]:
-    academic_development_validation = validate_text(academic_development_extracted, validation_type)
-    creative_activity_validation = validate_text(creative_activity_extracted, validation_type)
-    detailed_ability_validation = validate_text(detailed_ability_extracted, validation_type)
-
+load_dotenv()
 
+# Upper bound on one student's analysis; sections not done by then are backfilled later
+JOB_TIMEOUT = float(os.getenv("MEDSKY_JOB_TIMEOUT", "90"))
+
+# Calls bound their own requests by the deadline; the hard cancellation comes this much
+# later so a validation cut short mid-continuation can still return its partial Feedbacks
+DEADLINE_GRACE = 1.0
+
+EXTRACTORS = {
+    'creative_activities': parse_creative_activity,
+    'academic_development': parse_academic_development,
+    'detailed_abilities': parse_detailed_ability,
+}
+
+@dataclass
+class StudentAnalysis:
+    sections: Dict[str, str]
+    section_starts: Dict[str, int] = field(default_factory=dict)
+    page_map: Optional[PageMap] = None
+    extractions: Dict[str, object] = field(default_factory=dict)
+    validations: Dict[Tuple[str, str], object] = field(default_factory=dict)
+    missing_extractions: List[str] = field(default_factory=list)
+    missing_validations: List[Tuple[str, str]] = field(default_factory=list)
+    partial_validations: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing_extractions and not self.missing_validations
+
+    def status(self) -> dict:
+        return {
+            "complete": self.complete,
+            "missing_extractions": self.missing_extractions,
+            "missing_validations": [
+                {"section": section, "validation_type": validation_type}
+                for section, validation_type in self.missing_validations
+            ],
+            "partial_validations": [
+                {"section": section, "validation_type": validation_type}
+                for section, validation_type in self.partial_validations
+            ],
+        }
+
+
+def parse_pdf(file_path: str) -> Tuple[str, PageMap]:
+    """
+    Parse a student record PDF with LlamaParse and concatenate the page texts.
+
+    Returns:
+        tuple: (parsed_text, PageMap of page and line offsets in parsed_text)
+    """
+    with profile_stage("parse_pdf"):
+        result = get_llama_parser().parse(file_path)
+
+        page_texts = [page.text for page in result.pages]
+        page_numbers = [getattr(page, "page", index + 1) for index, page in enumerate(result.pages)]
+        return "".join(page_texts), PageMap.from_pages(page_texts, page_numbers)
+
+
+async def _run_jobs(analysis: StudentAnalysis, extractions: List[str], validations: List[Tuple[str, str]],
+                    deadline: Optional[Deadline]):
+    """Run the given extraction and validation jobs, recording what is still missing."""
+    async def bounded(coro, what):
+        if deadline is None:
+            return await coro
+        return await deadline.run(coro, what, grace=DEADLINE_GRACE)
+
+    jobs = [
+        bounded(EXTRACTORS[section](analysis.sections[section], deadline), f"{section} extraction")
+        for section in extractions
+    ] + [
+        bounded(validate_text(analysis.sections[section], validation_type, deadline=deadline),
+                f"{section}/{validation_type} validation")
+        for section, validation_type in validations
+    ]
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+
+    analysis.missing_extractions = []
+    analysis.missing_validations = []
+    analysis.partial_validations = []
+    for section, result in zip(extractions, results[:len(extractions)]):
+        if isinstance(result, BaseException):
+            print(f"⏱️  {section} extraction missing: {str(result)[:100]}")
+            analysis.missing_extractions.append(section)
+        else:
+            analysis.extractions[section] = result
+    for pair, result in zip(validations, results[len(extractions):]):
+        if isinstance(result, BaseException):
+            if not isinstance(result, DeadlineExceeded):
+                print(f"❌ {pair[0]}/{pair[1]} validation failed: {str(result)[:100]}")
+            analysis.missing_validations.append(pair)
+        else:
+            analysis.validations[pair] = result
+            if result.partial:
+                # Saved now, and listed as missing too so the backfill redoes the whole pair
+                analysis.partial_validations.append(pair)
+                analysis.missing_validations.append(pair)
+    return analysis
+
+
+async def analyze_student(parsed_text: str, timeout: float = JOB_TIMEOUT,
+                          job_class: str = "interactive", tenant: str = "default",
+                          page_map: Optional[PageMap] = None) -> StudentAnalysis:
+    """
+    Split, extract and validate one student record within a fixed deadline.
+
+    The deadline is shared by every extraction and validation call. Calls that
+    would run past it are cancelled and their section/type pairs are listed as
+    missing in the returned analysis instead of delaying the whole job.
+
+    Args:
+        parsed_text (str): Full parsed text of the student record
+        timeout (float): Seconds the whole analysis may take
+        job_class (str): Scheduler class of the LLM calls, 'interactive' or 'batch'
+        tenant (str): Tenant / school used for scheduler fairness
+        page_map (PageMap, optional): Page/line offsets from parse_pdf, kept for provenance
+
+    Returns:
+        StudentAnalysis: The (possibly partial) analysis
+    """
+    with profile_stage("split"):
+        sections, section_starts = split_sections_with_offsets(parsed_text)
+    analysis = StudentAnalysis(sections=sections, section_starts=section_starts, page_map=page_map)
+    validations = [(section, validation_type) for section in EXTRACTORS for validation_type in VALIDATION_TYPES]
+    with job_context(job_class, tenant), profile_stage("extract_validate"):
+        return await _run_jobs(analysis, list(EXTRACTORS), validations, Deadline(timeout))
+
+
+async def backfill_missing(analysis: StudentAnalysis, timeout: Optional[float] = None,
+                           tenant: str = "default") -> StudentAnalysis:
+    """
+    Fill in the extractions and validations a deadline-bounded run left out.
+
+    Backfill runs in the 'batch' scheduler class so it only uses spare capacity.
+
+    Args:
+        analysis (StudentAnalysis): A partial analysis from analyze_student
+        timeout (float, optional): Deadline for the backfill itself, unbounded if None
+        tenant (str): Tenant / school used for scheduler fairness
+
+    Returns:
+        StudentAnalysis: The same analysis, updated in place
+    """
+    if analysis.complete:
+        return analysis
+    deadline = Deadline(timeout) if timeout is not None else None
+    with job_context("batch", tenant), profile_stage("backfill"):
+        return await _run_jobs(analysis, analysis.missing_extractions, analysis.missing_validations, deadline)
+
+
+def start_backfill(analysis: StudentAnalysis, timeout: Optional[float] = None,
+                   tenant: str = "default") -> Optional[asyncio.Task]:
+    """Schedule backfill_missing in the background; returns None if nothing is missing."""
+    if analysis.complete:
+        return None
+    return asyncio.create_task(backfill_missing(analysis, timeout, tenant))
+
+
+def save_analysis(analysis: StudentAnalysis, output_dir: str):
+    """
+    Save extractions, validations, the missing-pair status and the Feedback
+    provenance (page/line of every sentence) to output_dir.
+    """
+    with profile_stage("save"):
+        _save_analysis(analysis, output_dir)
+
+
+def _save_analysis(analysis: StudentAnalysis, output_dir: str):
+    os.makedirs(output_dir, exist_ok=True)
+    for section, extracted in analysis.extractions.items():
+        with open(os.path.join(output_dir, f"{section}_parsed.json"), "w", encoding="utf-8") as f:
+            json.dump(extracted.model_dump(), f, ensure_ascii=False, indent=2)
+    for (section, validation_type), result in analysis.validations.items():
+        with open(os.path.join(output_dir, f"{section}_{validation_type}.json"), "w", encoding="utf-8") as f:
+            json.dump(result.model_dump(), f, ensure_ascii=False, indent=2)
+    with open(os.path.join(output_dir, "analysis_status.json"), "w", encoding="utf-8") as f:
+        json.dump(analysis.status(), f, ensure_ascii=False, indent=2)
+    provenance = build_provenance(analysis.page_map, analysis.section_starts, analysis.sections, analysis.validations)
+    with open(os.path.join(output_dir, "provenance.json"), "w", encoding="utf-8") as f:
+        json.dump(provenance, f, ensure_ascii=False, separators=(",", ":"))
+
+
+async def main():
+    file_path = "dev/medsky/file/park/park_sample.pdf"
+    output_dir = "dev/medsky/results/park"
+
+    configure_scheduler(scheduler_from_options())
+
+    # Set MEDSKY_PROFILE_DIR to profile every stage (see profiling.py)
+    with profile_student("park"):
+        parsed_text, page_map = parse_pdf(file_path)
+
+        analysis = await analyze_student(parsed_text, page_map=page_map)
+        save_analysis(analysis, output_dir)
+        if analysis.complete:
+            print(f"✅ Analysis completed within {JOB_TIMEOUT:.0f}s")
+            print(f"📊 Scheduler: {json.dumps(scheduler_stats())}")
+            return
+
+        print(f"⏱️  Partial result saved, {len(analysis.missing_validations)} validations missing. Backfilling...")
+        await start_backfill(analysis)
+        save_analysis(analysis, output_dir)
+        print(f"✅ Backfill finished ({len(analysis.missing_validations)} validations still missing)")
+        print(f"📊 Scheduler: {json.dumps(scheduler_stats())}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
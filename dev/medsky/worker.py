@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Long-lived pipeline worker
+
+Reads jobs as JSON lines on stdin (or from a directory queue) and runs them in
+one process and one event loop, so the parser and LLM clients stay warm between
+students. Heavy stage modules (pydantic models, openai, llama_cloud_services)
+are only imported when the first job that needs them arrives. After --max-jobs
+jobs the worker re-executes itself to cap memory growth.
+
+Job format:
+    {"job_id": "park", "pdf_path": "...", "output_dir": "...", "timeout": 90, "tenant": "school_a"}
+    {"job_id": "park", "parsed_text_path": "...", "output_dir": "...", "mode": "split"}
+
+mode is "analyze" (default: split, extract and validate) or "split" (regex split only).
+One JSON result line per job is written to stdout; analyze results carry the
+LLM scheduler's per-class queue stats. An analyze job that hits its deadline is
+reported as soon as the partial result is saved; the missing pairs are then
+backfilled in the background (batch class), the output re-saved and a second
+line with "event": "backfill" written. With --profile-dir every job
+is profiled per stage under PROFILE_DIR/<job_id>/ (see profiling.py);
+background backfills are not profiled.
+
+With --queue-dir, a claimed job is renamed to running/<pid>~<name>; on startup
+jobs whose worker process is gone (crash, OOM kill) are moved back to pending/.
+A job file or stdin line that is not a JSON object is reported as an error
+(and the file moved to done/) instead of stopping the worker.
+
+Usage:
+    python worker.py < jobs.jsonl
+    python worker.py --queue-dir dev/medsky/queue --max-jobs 200
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+
+from profiling import PROFILE_DIR, configure_profiling, profile_stage, profile_student, unprofiled
+from scheduler import add_scheduler_arguments, configure_scheduler, scheduler_from_args, scheduler_stats
+
+_stage_modules = {}
+_backfills = set()
+
+
+def _stage(name: str):
+    """Import a pipeline module on first use and keep it for later jobs."""
+    if name not in _stage_modules:
+        _stage_modules[name] = importlib.import_module(name)
+    return _stage_modules[name]
+
+
+def _read_line(fd: int = 0):
+    """
+    Read one line from a file descriptor without read-ahead buffering, so jobs
+    not yet read are still on stdin when the worker re-executes itself.
+    """
+    chunks = []
+    while True:
+        byte = os.read(fd, 1)
+        if not byte:
+            return b"".join(chunks).decode("utf-8") if chunks else None
+        chunks.append(byte)
+        if byte == b"\n":
+            return b"".join(chunks).decode("utf-8")
+
+
+def _save_sections(sections: dict, output_dir: str):
+    os.makedirs(output_dir, exist_ok=True)
+    for section, text in sections.items():
+        if text:
+            with open(os.path.join(output_dir, f"{section}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+
+async def run_job(job: dict) -> dict:
+    """
+    Run one job and describe the outcome.
+
+    Args:
+        job (dict): A job as described in the module docstring
+
+    Returns:
+        dict: job_id, status, elapsed seconds and, for analyze jobs, what is missing
+    """
+    with profile_student(job.get("job_id") or "job"):
+        return await _run_job(job)
+
+
+async def _run_job(job: dict) -> dict:
+    start = time.perf_counter()
+    result = {"job_id": job.get("job_id")}
+    try:
+        page_map = None
+        if "pdf_path" in job:
+            parsed_text, page_map = await asyncio.to_thread(_stage("whole_flow").parse_pdf, job["pdf_path"])
+        else:
+            with open(job["parsed_text_path"], "r", encoding="utf-8") as f:
+                parsed_text = f.read()
+
+        if job.get("mode", "analyze") == "split":
+            with profile_stage("split"):
+                sections = _stage("exp2_parsing_via_regex").split_sections(parsed_text)
+            if job.get("output_dir"):
+                with profile_stage("save"):
+                    _save_sections(sections, job["output_dir"])
+            result["sections"] = {section: len(text) for section, text in sections.items()}
+        else:
+            whole_flow = _stage("whole_flow")
+            analysis = await whole_flow.analyze_student(
+                parsed_text,
+                timeout=job.get("timeout", whole_flow.JOB_TIMEOUT),
+                job_class=job.get("job_class", "interactive"),
+                tenant=job.get("tenant", "default"),
+                page_map=page_map,
+            )
+            if job.get("output_dir"):
+                whole_flow.save_analysis(analysis, job["output_dir"])
+            result.update(analysis.status())
+            result["scheduler"] = scheduler_stats()
+            if not analysis.complete:
+                task = asyncio.create_task(_backfill(job, analysis))
+                _backfills.add(task)
+                task.add_done_callback(_backfills.discard)
+                result["backfill"] = "scheduled"
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)[:500]
+    result["elapsed"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+async def _backfill(job: dict, analysis):
+    """Fill in the pairs a partial analyze job left out, re-save it and report the outcome."""
+    whole_flow = _stage("whole_flow")
+    start = time.perf_counter()
+    result = {"job_id": job.get("job_id"), "event": "backfill"}
+    try:
+        # Runs next to later jobs; profiled, it would take their samples (see profiling.py)
+        with unprofiled():
+            await whole_flow.backfill_missing(analysis, timeout=job.get("backfill_timeout"),
+                                              tenant=job.get("tenant", "default"))
+            if job.get("output_dir"):
+                whole_flow.save_analysis(analysis, job["output_dir"])
+        result.update(analysis.status())
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)[:500]
+    result["elapsed"] = round(time.perf_counter() - start, 4)
+    _emit(result)
+
+
+async def _drain_backfills():
+    """Wait for the background backfills before the worker exits or re-executes itself."""
+    while _backfills:
+        await asyncio.gather(*list(_backfills))
+
+
+def _parse_job(text: str) -> dict:
+    """Decode one job; raises ValueError for invalid JSON or anything but a JSON object."""
+    job = json.loads(text)
+    if not isinstance(job, dict):
+        raise ValueError(f"job must be a JSON object, got {type(job).__name__}")
+    return job
+
+
+def _emit(result: dict):
+    sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+async def serve_stdin(max_jobs: int) -> bool:
+    """Process stdin jobs; returns True if the worker should recycle itself."""
+    processed = 0
+    while True:
+        line = await asyncio.to_thread(_read_line)
+        if line is None:
+            await _drain_backfills()
+            return False
+        if not line.strip():
+            continue
+        try:
+            job = _parse_job(line)
+        except ValueError as e:
+            _emit({"status": "error", "error": f"invalid job line: {e}"})
+            continue
+        _emit(await run_job(job))
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            await _drain_backfills()
+            return True
+
+
+def _claim_next(queue_dir: str):
+    """Atomically move the oldest pending job into running/, tagged with this worker's pid, and return its path."""
+    pending = os.path.join(queue_dir, "pending")
+    running = os.path.join(queue_dir, "running")
+    for name in sorted(os.listdir(pending)):
+        if not name.endswith(".json"):
+            continue
+        target = os.path.join(running, f"{os.getpid()}~{name}")
+        try:
+            os.rename(os.path.join(pending, name), target)
+        except FileNotFoundError:
+            continue  # Claimed by another worker
+        return target
+    return None
+
+
+def _job_name(path: str) -> str:
+    """Queue file name of a claimed job, without the running/ pid tag."""
+    return os.path.basename(path).split("~", 1)[-1]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def _reclaim_running(queue_dir: str) -> int:
+    """
+    Move jobs stranded in running/ back to pending/.
+
+    A job is stranded when the worker that claimed it no longer runs (or is this
+    process, which has not claimed anything yet). Untagged files from older
+    workers are always reclaimed. Liveness is checked by pid, so workers sharing
+    one queue directory must run on the same host.
+
+    Returns:
+        int: Number of jobs moved back to pending/
+    """
+    running = os.path.join(queue_dir, "running")
+    reclaimed = 0
+    for name in os.listdir(running):
+        if not name.endswith(".json"):
+            continue
+        owner = name.split("~", 1)[0] if "~" in name else None
+        if owner and owner.isdigit() and int(owner) != os.getpid() and _pid_alive(int(owner)):
+            continue
+        try:
+            os.rename(os.path.join(running, name), os.path.join(queue_dir, "pending", _job_name(name)))
+        except FileNotFoundError:
+            continue  # Reclaimed by another worker
+        reclaimed += 1
+    if reclaimed:
+        print(f"♻️  Moved {reclaimed} stranded jobs from running/ back to pending/", file=sys.stderr)
+    return reclaimed
+
+
+async def serve_queue_dir(queue_dir: str, max_jobs: int, poll_interval: float, exit_when_empty: bool) -> bool:
+    """Process jobs from queue_dir/pending; returns True if the worker should recycle itself."""
+    for sub in ("pending", "running", "done"):
+        os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+    _reclaim_running(queue_dir)
+
+    processed = 0
+    while True:
+        path = _claim_next(queue_dir)
+        if path is None:
+            if exit_when_empty:
+                await _drain_backfills()
+                return False
+            await asyncio.sleep(poll_interval)
+            continue
+
+        job_id = os.path.splitext(_job_name(path))[0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                job = _parse_job(f.read())
+        except (OSError, ValueError) as e:
+            # Finish it as failed: left in running/, it would be reclaimed and crash every restart
+            job, result = None, {"job_id": job_id, "status": "error", "error": f"invalid job file: {e}"[:500]}
+        else:
+            job.setdefault("job_id", job_id)
+            result = await run_job(job)
+
+        done_path = os.path.join(queue_dir, "done", _job_name(path))
+        with open(done_path, "w", encoding="utf-8") as f:
+            json.dump({"job": job, "result": result}, f, ensure_ascii=False)
+        os.remove(path)
+        _emit(result)
+
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            await _drain_backfills()
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived medsky pipeline worker")
+    parser.add_argument("--queue-dir", help="Read jobs from QUEUE_DIR/pending instead of stdin")
+    parser.add_argument("--max-jobs", type=int, default=int(os.getenv("MEDSKY_WORKER_MAX_JOBS", "500")),
+                        help="Re-execute the worker after this many jobs (0 = never)")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--exit-when-empty", action="store_true", help="Stop once the queue directory is empty")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Profile every job's stages into this directory")
+    add_scheduler_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling(args.profile_dir)
+    configure_scheduler(scheduler_from_args(args))
+
+    if args.queue_dir:
+        recycle = asyncio.run(serve_queue_dir(args.queue_dir, args.max_jobs, args.poll_interval, args.exit_when_empty))
+    else:
+        recycle = asyncio.run(serve_stdin(args.max_jobs))
+
+    if recycle:
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+if __name__ == "__main__":
+    main()